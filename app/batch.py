@@ -0,0 +1,205 @@
+from typing import Literal, Optional
+from fastapi import HTTPException
+from pydantic import BaseModel
+from prisma.errors import UniqueViolationError
+from app.prisma import prisma
+
+# Largest batch accepted in one request, and rows written per database round trip
+MAX_BATCH_SIZE = 10000
+BATCH_CHUNK_SIZE = 1000
+
+
+# Schema for the outcome of a single item in a batch request
+class BatchItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: Literal["created", "updated", "deleted", "conflict", "not_found"]
+    detail: Optional[str] = None
+
+
+# Schema for the outcome of a whole batch request
+class BatchResult(BaseModel):
+    results: list[BatchItemResult]
+    counts: dict[str, int]
+
+
+# Schema for deleting records in bulk by ID
+class BatchDelete(BaseModel):
+    ids: list[str]
+
+
+def chunked(indexes, size: int = BATCH_CHUNK_SIZE):
+    """Split a list of item indexes into chunks of at most `size`."""
+    return [indexes[i : i + size] for i in range(0, len(indexes), size)]
+
+
+def check_batch_size(items):
+    """Reject batches larger than MAX_BATCH_SIZE."""
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large (maximum {MAX_BATCH_SIZE} items)",
+        )
+
+
+def batch_result(results):
+    """Wrap per-item results with a count of each status."""
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {"results": results, "counts": counts}
+
+
+def claim_names(items, indexes, results):
+    """Mark items reusing a name already claimed earlier in the request as conflicts."""
+    claimed = set()
+    remaining = []
+    for i in indexes:
+        name = getattr(items[i], "name", None)
+        if name is not None and name in claimed:
+            results[i] = {
+                "index": i,
+                "status": "conflict",
+                "detail": f"Duplicate name '{name}' in request",
+            }
+            continue
+        if name is not None:
+            claimed.add(name)
+        remaining.append(i)
+    return remaining
+
+
+async def batch_create(delegate_name: str, items):
+    """Create records in chunked `create_many` calls, reporting unique-name conflicts."""
+    check_batch_size(items)
+    delegate = getattr(prisma, delegate_name)
+    results = [None] * len(items)
+
+    for chunk in chunked(claim_names(items, list(range(len(items))), results)):
+        # Find names that are already taken in a single query
+        names = [items[i].name for i in chunk]
+        taken = {
+            row.name for row in await delegate.find_many(where={"name": {"in": names}})
+        }
+        new = []
+        for i in chunk:
+            if items[i].name in taken:
+                results[i] = {
+                    "index": i,
+                    "status": "conflict",
+                    "detail": f"Name '{items[i].name}' already exists",
+                }
+            else:
+                new.append(i)
+
+        if not new:
+            continue
+
+        async with prisma.tx() as transaction:
+            batch_delegate = getattr(transaction, delegate_name)
+            await batch_delegate.create_many(
+                data=[items[i].dict() for i in new], skip_duplicates=True
+            )
+            created = {
+                row.name: row.id
+                for row in await batch_delegate.find_many(
+                    where={"name": {"in": [items[i].name for i in new]}}
+                )
+            }
+
+        for i in new:
+            results[i] = {"index": i, "id": created.get(items[i].name)}
+            results[i]["status"] = "created" if results[i]["id"] else "conflict"
+
+    return batch_result(results)
+
+
+async def batch_update(delegate_name: str, items):
+    """Apply partial updates in one transactional round trip per chunk."""
+    check_batch_size(items)
+    delegate = getattr(prisma, delegate_name)
+    results = [None] * len(items)
+
+    # Reject repeated IDs and names within the request up front
+    seen_ids = set()
+    indexes = []
+    for i, item in enumerate(items):
+        if item.id in seen_ids:
+            results[i] = {
+                "index": i,
+                "id": item.id,
+                "status": "conflict",
+                "detail": "Duplicate ID in request",
+            }
+        else:
+            seen_ids.add(item.id)
+            indexes.append(i)
+    indexes = claim_names(items, indexes, results)
+
+    for chunk in chunked(indexes):
+        ids = [items[i].id for i in chunk]
+        names = [items[i].name for i in chunk if items[i].name is not None]
+        found = {row.id for row in await delegate.find_many(where={"id": {"in": ids}})}
+        owners = {
+            row.name: row.id
+            for row in await delegate.find_many(where={"name": {"in": names}})
+        }
+
+        valid = []
+        for i in chunk:
+            item = items[i]
+            if item.id not in found:
+                results[i] = {"index": i, "id": item.id, "status": "not_found"}
+            elif item.name is not None and owners.get(item.name, item.id) != item.id:
+                results[i] = {
+                    "index": i,
+                    "id": item.id,
+                    "status": "conflict",
+                    "detail": f"Name '{item.name}' already exists",
+                }
+            else:
+                valid.append(i)
+
+        if not valid:
+            continue
+
+        try:
+            async with prisma.batch_() as batcher:
+                batch_delegate = getattr(batcher, delegate_name)
+                for i in valid:
+                    batch_delegate.update(
+                        where={"id": items[i].id},
+                        data=items[i].dict(exclude_unset=True, exclude={"id"}),
+                    )
+            status, detail = "updated", None
+        except UniqueViolationError as e:
+            # Names swapped within one chunk can still collide; the chunk rolls back
+            status, detail = "conflict", f"Chunk rolled back: {e}"
+
+        for i in valid:
+            results[i] = {"index": i, "id": items[i].id, "status": status}
+            if detail:
+                results[i]["detail"] = detail
+
+    return batch_result(results)
+
+
+async def batch_delete(delegate_name: str, ids):
+    """Delete records in chunked `delete_many` calls, reporting IDs that were not found."""
+    check_batch_size(ids)
+    delegate = getattr(prisma, delegate_name)
+    results = []
+
+    for chunk in chunked(list(range(len(ids)))):
+        chunk_ids = [ids[i] for i in chunk]
+        found = {
+            row.id for row in await delegate.find_many(where={"id": {"in": chunk_ids}})
+        }
+        if found:
+            await delegate.delete_many(where={"id": {"in": list(found)}})
+
+        for i in chunk:
+            status = "deleted" if ids[i] in found else "not_found"
+            results.append({"index": i, "id": ids[i], "status": status})
+
+    return batch_result(results)
@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries also expire `ttl` seconds after being set."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Bumped by clear(), so loads that straddle it do not cache stale values
+        self.generation = 0
+
+    def get(self, key, default=None):
+        """Return a live cached value, refreshing its LRU position, or `default`."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            self.expirations += 1
+
+        self.misses += 1
+        return default
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries past `maxsize`."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry."""
+        self._entries.clear()
+        self.generation += 1
+
+    async def get_or_load(self, key, loader):
+        """Read-through lookup: on a miss, await `loader()` and cache any non-None result.
+
+        A result is not cached if the cache was cleared while it loaded, since
+        the loader may have read the data the clear was meant to evict.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            generation = self.generation
+            value = await loader()
+            if value is not None and self.generation == generation:
+                self.set(key, value)
+        return value
+
+    def stats(self):
+        """Report hit/miss metrics and occupancy."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
@@ -1,6 +1,18 @@
-from fastapi import APIRouter, HTTPException
-from app.prisma import prisma, connect_prisma, disconnect_prisma
-from .schema import CareerCreate, CareerUpdate, CareerModel
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.prisma import prisma
+from app.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    Page,
+    name_filter,
+    paginate,
+)
+from app.export import export_response
+from app.serialization import RowEncoder, json_response
+from app.projection import find_unique
+from app.batch import BatchDelete, BatchResult, batch_create, batch_delete, batch_update
+from .schema import CareerCreate, CareerUpdate, CareerModel, CareerBatchUpdate
 
 # Initialize the router with a prefix for all career endpoints
 router = APIRouter(
@@ -11,24 +23,29 @@ router = APIRouter(
     ],  # Optionally, you can add tags for documentation purposes
 )
 
-
-# Use the connect/disconnect from prisma.py
-@router.on_event("startup")
-async def startup():
-    await connect_prisma()
+# Encoder for career rows returned by the read endpoints
+career_encoder = RowEncoder(CareerModel)
 
 
-@router.on_event("shutdown")
-async def shutdown():
-    await disconnect_prisma()
+# Get a page of careers
+@router.get("/", response_model=Page[CareerModel])
+async def get_all_careers(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Fetch a page of career records, optionally filtered by name and limited to the comma-separated `fields`, ordered by creation time."""
+    encoder = career_encoder.select(fields)
+    careers = await paginate(prisma.career, limit, cursor, name_filter(q), encoder)
+    return json_response(encoder.encode_page(careers))
 
 
-# Get all careers
-@router.get("/", response_model=list[CareerModel])
-async def get_all_careers():
-    """Fetch all career records."""
-    careers = await prisma.career.find_many()
-    return careers
+# Export all careers as NDJSON or CSV
+@router.get("/export")
+async def export_careers(format: Literal["ndjson", "csv"] = "ndjson"):
+    """Stream every career record as NDJSON or CSV using chunked database reads."""
+    return export_response(prisma.career, CareerModel, format, "careers")
 
 
 # Create a career
@@ -39,14 +56,36 @@ async def create_career(career_data: CareerCreate):
     return career
 
 
+# Create careers in bulk
+@router.post("/batch", response_model=BatchResult)
+async def create_careers_batch(careers_data: list[CareerCreate]):
+    """Create many career records at once, reporting each item's result including name conflicts."""
+    return await batch_create("career", careers_data)
+
+
+# Update careers in bulk
+@router.patch("/batch", response_model=BatchResult)
+async def update_careers_batch(careers_data: list[CareerBatchUpdate]):
+    """Partially update many career records at once, reporting each item's result."""
+    return await batch_update("career", careers_data)
+
+
+# Delete careers in bulk
+@router.delete("/batch", response_model=BatchResult)
+async def delete_careers_batch(batch: BatchDelete):
+    """Delete many career records by ID at once, reporting IDs that were not found."""
+    return await batch_delete("career", batch.ids)
+
+
 # Get a specific career by ID
 @router.get("/{career_id}", response_model=CareerModel)
-async def get_career(career_id: str):
-    """Fetch a career by its ID."""
-    career = await prisma.career.find_unique(where={"id": career_id})
+async def get_career(career_id: str, fields: Optional[str] = None):
+    """Fetch a career by its ID, optionally limited to the comma-separated `fields`."""
+    encoder = career_encoder.select(fields)
+    career = await find_unique(prisma.career, encoder, {"id": career_id})
     if not career:
         raise HTTPException(status_code=404, detail="Career not found")
-    return career
+    return json_response(encoder.encode_row(career))
 
 
 # Update a career by ID
@@ -31,3 +31,8 @@ class CareerModel(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# Schema for updating an existing Career as part of a batch, identified by its ID
+class CareerBatchUpdate(CareerUpdate):
+    id: str
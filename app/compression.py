@@ -0,0 +1,193 @@
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Responses smaller than this are sent uncompressed, overridable through the environment
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+
+# Media types worth compressing
+COMPRESSIBLE_TYPES = (
+    b"application/json",
+    b"application/x-ndjson",
+    b"application/xml",
+    b"text/",
+)
+
+
+class GzipEncoder:
+    def __init__(self):
+        # wbits 16+ writes a gzip header and trailer around the deflate stream
+        self._compressor = zlib.compressobj(5, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# Supported encodings in server preference order, skipping any whose library is missing
+ENCODERS = {
+    name: encoder
+    for name, encoder, available in (
+        ("zstd", ZstdEncoder, zstandard is not None),
+        ("br", BrotliEncoder, brotli is not None),
+        ("gzip", GzipEncoder, True),
+    )
+    if available
+}
+
+
+def negotiate(accept_encoding: str):
+    """Pick the best supported encoding the client accepts, or None for identity."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    best = None
+    for name in ENCODERS:
+        quality = accepted.get(name, accepted.get("*", 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (name, quality)
+    return best[0] if best else None
+
+
+def is_compressible(headers) -> bool:
+    content_type = b""
+    for key, value in headers:
+        if key.lower() == b"content-encoding":
+            return False
+        if key.lower() == b"content-type":
+            content_type = value.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing large textual responses with zstd, brotli or gzip.
+
+    The encoding is negotiated from `Accept-Encoding`. Streamed bodies (such as
+    exports) are compressed chunk by chunk with a flush after each, so rows keep
+    reaching the client as they are produced. Strong ETags get the encoding
+    appended, since each encoding is a different representation.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = b""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value
+        encoding = negotiate(accept_encoding.decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder = None
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder
+
+            if message["type"] == "http.response.start":
+                # Hold the headers until the first body chunk shows the response size
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                start, start_message = start_message, None
+                headers = list(start.get("headers", []))
+                if not is_compressible(headers) or (
+                    not more_body and len(body) < self.minimum_size
+                ):
+                    if is_compressible(headers):
+                        headers.append((b"vary", b"Accept-Encoding"))
+                    await send({**start, "headers": headers})
+                    await send(message)
+                    return
+
+                encoder = ENCODERS[encoding]()
+                headers = [
+                    (key, compressed_etag(value, encoding) if key == b"etag" else value)
+                    for key, value in headers
+                    if key.lower() != b"content-length"
+                ]
+                headers.append((b"content-encoding", encoding.encode()))
+                headers.append((b"vary", b"Accept-Encoding"))
+                await send({**start, "headers": headers})
+
+            if encoder is None:
+                await send(message)
+                return
+
+            data = encoder.compress(body) if body else b""
+            if not more_body:
+                data += encoder.finish()
+            await send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_compressed)
+
+
+def compressed_etag(etag: bytes, encoding: str) -> bytes:
+    """Append the content coding to a strong ETag, e.g. `"abc"` -> `"abc-gzip"`."""
+    if etag.startswith(b"W/") or not etag.endswith(b'"'):
+        return etag
+    return etag[:-1] + f"-{encoding}".encode() + b'"'
@@ -0,0 +1,174 @@
+import os
+import hashlib
+from starlette.routing import Match
+from app.cache import TTLCache
+from app.compression import ENCODERS
+from app.prisma import prisma
+
+# Seconds a table version is trusted before it is read again, and the browser/CDN
+# max-age for ONET reference data, overridable through the environment
+TABLE_VERSION_TTL = float(os.getenv("TABLE_VERSION_TTL", "1"))
+REFERENCE_MAX_AGE = int(os.getenv("REFERENCE_MAX_AGE", "300"))
+
+# Tables each read endpoint depends on, and how long clients may reuse a response
+# without revalidating (0 means every reuse must be revalidated with If-None-Match)
+CONDITIONAL_ROUTES = {
+    "/v1/careers": (("Career",), 0),
+    "/v1/skills": (("Skill",), 0),
+    "/v1/credentials": (("Credential",), 0),
+    "/v1/industries": (("Industry",), 0),
+    "/v1/onetoccupations": (("OnetOccupation",), REFERENCE_MAX_AGE),
+    "/v1/onetindustries": (("OnetIndustry",), REFERENCE_MAX_AGE),
+    "/v1/onetimports": (("OnetImport", "OnetOccupation", "OnetIndustry"), 0),
+    "/v1/search": (
+        (
+            "Career",
+            "Skill",
+            "Credential",
+            "Industry",
+            "OnetOccupation",
+            "OnetIndustry",
+        ),
+        0,
+    ),
+}
+
+# Read endpoints whose responses do not come from the database
+UNVERSIONED_SUFFIXES = ("/fetch", "/cache/stats")
+
+# Row count and last update of each table, keyed by table name
+table_versions = TTLCache(maxsize=64, ttl=TABLE_VERSION_TTL)
+
+
+def match_route(path: str):
+    """Return the (tables, max_age) entry for a path, or None if it is not versioned."""
+    if path.endswith(UNVERSIONED_SUFFIXES):
+        return None
+    for prefix, entry in CONDITIONAL_ROUTES.items():
+        if path == prefix or path.startswith(prefix + "/"):
+            return entry
+    return None
+
+
+async def load_versions(tables):
+    """Read the row count and newest `updatedAt` of each table in one query."""
+    query = " UNION ALL ".join(
+        f"SELECT '{table}' AS name, count(*)::int AS rows, "
+        f'max("updatedAt")::text AS updated FROM "{table}"'
+        for table in tables
+    )
+    rows = await prisma.query_raw(query)
+    return {row["name"]: f"{row['rows']}:{row['updated']}" for row in rows}
+
+
+async def table_version(tables) -> str:
+    """Combine the cached versions of several tables, reading any that expired."""
+    versions = {table: table_versions.get(table) for table in tables}
+    stale = [table for table, version in versions.items() if version is None]
+    if stale:
+        for table, version in (await load_versions(stale)).items():
+            table_versions.set(table, version)
+            versions[table] = version
+    return ",".join(versions[table] for table in tables)
+
+
+def make_etag(version: str, path: str, query_string: bytes) -> str:
+    """Strong ETag for one URL at one data version."""
+    digest = hashlib.sha256(f"{version}|{path}?".encode() + query_string)
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str, etag: str):
+    """Find the If-None-Match entry matching an ETag, using weak comparison.
+
+    Compressed responses carry the ETag with their content coding appended
+    (e.g. `"abc-gzip"`), which still matches the uncompressed `"abc"`.
+    """
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        tag = candidate.removeprefix("W/")
+        if tag == etag or any(
+            tag == f'{etag[:-1]}-{encoding}"' for encoding in ENCODERS
+        ):
+            return candidate
+    return None
+
+
+def resolve_route(scope):
+    """Find the route a request would reach, for middleware answering before the router.
+
+    The router stores the matched route in the scope; a response sent without
+    reaching it still needs the route for the metrics middleware's labels.
+    """
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
+
+
+def cache_control(max_age: int) -> str:
+    if max_age:
+        return f"public, max-age={max_age}"
+    return "public, max-age=0, must-revalidate"
+
+
+class ConditionalGetMiddleware:
+    """ASGI middleware answering conditional GETs from table versions.
+
+    The ETag is derived from the row count and newest `updatedAt` of the tables
+    behind a route plus the request URL, so a matching `If-None-Match` is
+    answered with `304 Not Modified` before the endpoint runs. Writes through
+    the API drop the cached versions so the next read sees the change at once.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = match_route(scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] != "GET":
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                table_versions.clear()
+            return
+
+        tables, max_age = route
+        etag = make_etag(
+            await table_version(tables), scope["path"], scope["query_string"]
+        )
+        headers = [
+            (b"etag", etag.encode()),
+            (b"cache-control", cache_control(max_age).encode()),
+        ]
+
+        request_headers = dict(scope["headers"])
+        if_none_match = request_headers.get(b"if-none-match")
+        matched = if_none_match and etag_matches(if_none_match.decode("latin-1"), etag)
+        if matched:
+            # Echo the tag the client holds, which names its encoded representation
+            headers[0] = (b"etag", matched.encode())
+            scope["route"] = resolve_route(scope)
+            await send(
+                {"type": "http.response.start", "status": 304, "headers": headers}
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message["headers"] = [*message.get("headers", []), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -1,28 +1,52 @@
-from fastapi import APIRouter, HTTPException
-from app.prisma import prisma, connect_prisma, disconnect_prisma
-from .schema import CredentialCreate, CredentialUpdate, CredentialModel
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.prisma import prisma
+from app.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    Page,
+    name_filter,
+    paginate,
+)
+from app.export import export_response
+from app.serialization import RowEncoder, json_response
+from app.projection import find_unique
+from app.batch import BatchDelete, BatchResult, batch_create, batch_delete, batch_update
+from .schema import (
+    CredentialCreate,
+    CredentialUpdate,
+    CredentialModel,
+    CredentialBatchUpdate,
+)
 
 # Initialize the router with versioned prefix and specified tags
 router = APIRouter(prefix="/v1/credentials", tags=["Credentials", "Version 1"])
 
-
-# Prisma connection and disconnection lifecycle events
-@router.on_event("startup")
-async def startup():
-    await connect_prisma()
-
-
-@router.on_event("shutdown")
-async def shutdown():
-    await disconnect_prisma()
+# Encoder for credential rows returned by the read endpoints
+credential_encoder = RowEncoder(CredentialModel)
+
+
+# Get a page of credentials
+@router.get("/", response_model=Page[CredentialModel])
+async def get_all_credentials(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Fetch a page of credential records, optionally filtered by name and limited to the comma-separated `fields`, ordered by creation time."""
+    encoder = credential_encoder.select(fields)
+    credentials = await paginate(
+        prisma.credential, limit, cursor, name_filter(q), encoder
+    )
+    return json_response(encoder.encode_page(credentials))
 
 
-# Get all credentials
-@router.get("/", response_model=list[CredentialModel])
-async def get_all_credentials():
-    """Fetch all credential records."""
-    credentials = await prisma.credential.find_many()
-    return credentials
+# Export all credentials as NDJSON or CSV
+@router.get("/export")
+async def export_credentials(format: Literal["ndjson", "csv"] = "ndjson"):
+    """Stream every credential record as NDJSON or CSV using chunked database reads."""
+    return export_response(prisma.credential, CredentialModel, format, "credentials")
 
 
 # Create a new credential
@@ -33,14 +57,36 @@ async def create_credential(credential_data: CredentialCreate):
     return credential
 
 
+# Create credentials in bulk
+@router.post("/batch", response_model=BatchResult)
+async def create_credentials_batch(credentials_data: list[CredentialCreate]):
+    """Create many credential records at once, reporting each item's result including name conflicts."""
+    return await batch_create("credential", credentials_data)
+
+
+# Update credentials in bulk
+@router.patch("/batch", response_model=BatchResult)
+async def update_credentials_batch(credentials_data: list[CredentialBatchUpdate]):
+    """Partially update many credential records at once, reporting each item's result."""
+    return await batch_update("credential", credentials_data)
+
+
+# Delete credentials in bulk
+@router.delete("/batch", response_model=BatchResult)
+async def delete_credentials_batch(batch: BatchDelete):
+    """Delete many credential records by ID at once, reporting IDs that were not found."""
+    return await batch_delete("credential", batch.ids)
+
+
 # Get a specific credential by ID
 @router.get("/{credential_id}", response_model=CredentialModel)
-async def get_credential(credential_id: str):
-    """Fetch a credential by its ID."""
-    credential = await prisma.credential.find_unique(where={"id": credential_id})
+async def get_credential(credential_id: str, fields: Optional[str] = None):
+    """Fetch a credential by its ID, optionally limited to the comma-separated `fields`."""
+    encoder = credential_encoder.select(fields)
+    credential = await find_unique(prisma.credential, encoder, {"id": credential_id})
     if not credential:
         raise HTTPException(status_code=404, detail="Credential not found")
-    return credential
+    return json_response(encoder.encode_row(credential))
 
 
 # Update a credential by ID
@@ -29,3 +29,8 @@ class CredentialModel(CredentialCreate):
 
     class Config:
         from_attributes = True
+
+
+# Schema for updating an existing Credential as part of a batch, identified by its ID
+class CredentialBatchUpdate(CredentialUpdate):
+    id: str
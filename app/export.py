@@ -0,0 +1,63 @@
+import csv
+import io
+from fastapi.responses import StreamingResponse
+from app.pagination import paginate
+from app.serialization import RowEncoder
+
+# Number of rows read from the database per export query
+EXPORT_CHUNK_SIZE = 1000
+
+# Media type and file extension for each export format
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+async def iter_chunks(delegate, chunk_size: int = EXPORT_CHUNK_SIZE, where=None):
+    """Walk a whole table in keyset-ordered chunks without holding it in memory."""
+    cursor = None
+    while True:
+        page = await paginate(delegate, chunk_size, cursor, where)
+        if page["items"]:
+            yield page["items"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+
+async def ndjson_lines(delegate, model, where=None):
+    """Serialize rows as newline-delimited JSON, one chunk per yield."""
+    encoder = RowEncoder(model)
+    async for rows in iter_chunks(delegate, where=where):
+        yield b"".join(encoder.encode_row(row) + b"\n" for row in rows)
+
+
+async def csv_lines(delegate, model, where=None):
+    """Serialize rows as CSV, sending the header before the first query runs."""
+    encoder = RowEncoder(model)
+    fields = list(encoder.fields)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    async for rows in iter_chunks(delegate, where=where):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(encoder.jsonable(row) for row in rows)
+        yield buffer.getvalue()
+
+
+def export_response(delegate, model, format: str, filename: str, where=None):
+    """Stream every row of a table as NDJSON or CSV."""
+    media_type, extension = EXPORT_FORMATS[format]
+    lines = csv_lines if format == "csv" else ndjson_lines
+    return StreamingResponse(
+        lines(delegate, model, where),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{extension}"'
+        },
+    )
@@ -0,0 +1,18 @@
+import os
+from app.cache import TTLCache
+
+# ONET reference cache tuning, overridable through the environment
+ONET_CACHE_TTL = float(os.getenv("ONET_CACHE_TTL", "300"))
+ONET_CACHE_SIZE = int(os.getenv("ONET_CACHE_SIZE", "4096"))
+
+# One read-through cache per ONET record kind, keyed by ("id", id, fields), ("code", code, fields)
+# or ("list", limit, cursor, q, fields)
+onet_caches = {
+    "occupation": TTLCache(maxsize=ONET_CACHE_SIZE, ttl=ONET_CACHE_TTL),
+    "industry": TTLCache(maxsize=ONET_CACHE_SIZE, ttl=ONET_CACHE_TTL),
+}
+
+
+def invalidate_onet_cache(kind: str):
+    """Drop every cached entry for an ONET record kind after its data changed."""
+    onet_caches[kind].clear()
@@ -0,0 +1,344 @@
+import os
+import time
+import random
+import asyncio
+import httpx
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from app.external_data.onet.response_cache import OnetCacheMiss, ResponseCache
+from app.metrics.registry import (
+    ONET_CACHE_RESPONSES,
+    ONET_CIRCUIT_OPEN,
+    ONET_REQUEST_DURATION,
+    ONET_REQUEST_RETRIES,
+)
+
+# ONET API credentials
+API_USERNAME = os.getenv("ONET_USERNAME")
+API_PASSWORD = os.getenv("ONET_PASSWORD")
+ONET_API_BASE_URL = os.getenv(
+    "ONET_API_BASE_URL", "https://services.onetcenter.org/ws/online"
+)
+
+# Client tuning, overridable through the environment
+ONET_MAX_CONCURRENCY = int(os.getenv("ONET_MAX_CONCURRENCY", "8"))
+ONET_RATE_LIMIT = float(os.getenv("ONET_RATE_LIMIT", "10"))  # requests per second
+
+# Resilience tuning, overridable through the environment: seconds allowed per
+# attempt (connect, and each read of the body), seconds allowed for one call
+# including its retries, retries per call, and the backoff bounds in seconds
+ONET_REQUEST_TIMEOUT = float(os.getenv("ONET_REQUEST_TIMEOUT", "30"))
+ONET_TOTAL_TIMEOUT = float(os.getenv("ONET_TOTAL_TIMEOUT", "120"))
+ONET_MAX_RETRIES = int(os.getenv("ONET_MAX_RETRIES", "4"))
+ONET_BACKOFF_BASE = float(os.getenv("ONET_BACKOFF_BASE", "0.5"))
+ONET_BACKOFF_MAX = float(os.getenv("ONET_BACKOFF_MAX", "30"))
+
+# Consecutive failed attempts that open the circuit breaker, and seconds it stays
+# open before one probe request is let through
+ONET_BREAKER_THRESHOLD = int(os.getenv("ONET_BREAKER_THRESHOLD", "5"))
+ONET_BREAKER_RESET = float(os.getenv("ONET_BREAKER_RESET", "30"))
+
+# Upstream statuses worth retrying: throttling and transient server failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class OnetUnavailable(httpx.HTTPError):
+    """Raised without calling ONET while the circuit breaker is open."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """Parse a `Retry-After` header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class CircuitBreaker:
+    """Fail fast while ONET keeps failing, letting one probe through now and then.
+
+    After `threshold` consecutive failed attempts the circuit opens, and calls
+    raise `OnetUnavailable` without touching the network. Every
+    `reset_timeout` seconds one call is let through as a probe: a success
+    closes the circuit, a failure keeps it open for another period.
+    """
+
+    def __init__(
+        self,
+        threshold: int = ONET_BREAKER_THRESHOLD,
+        reset_timeout: float = ONET_BREAKER_RESET,
+    ):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def check(self):
+        """Raise `OnetUnavailable` unless a call may go ahead."""
+        if self.opened_at is None:
+            return
+        elapsed = time.monotonic() - self.opened_at
+        if elapsed >= self.reset_timeout:
+            # Let this call probe; the others keep failing fast meanwhile
+            self.opened_at = time.monotonic()
+            return
+        raise OnetUnavailable(
+            "ONET is unavailable after repeated failures",
+            self.reset_timeout - elapsed,
+        )
+
+    def record_success(self):
+        self.failures = 0
+        if self.opened_at is not None:
+            self.opened_at = None
+            ONET_CIRCUIT_OPEN.set(0)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            ONET_CIRCUIT_OPEN.set(1)
+
+
+class RateLimiter:
+    """Space out request starts so no more than `rate` begin per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until the next request slot is available."""
+        if not self.interval:
+            return
+
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class DeadlineByteStream(httpx.AsyncByteStream):
+    """Response body stream that raises `httpx.ReadTimeout` once a deadline passes.
+
+    httpx only bounds each read of the body, so a body trickling in slowly could
+    otherwise outlive the call's total timeout.
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream, deadline: float, request):
+        self.stream = stream
+        self.deadline = deadline
+        self.request = request
+
+    async def __aiter__(self):
+        chunks = self.stream.__aiter__()
+        while True:
+            remaining = max(self.deadline - time.monotonic(), 0)
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise httpx.ReadTimeout(
+                    "ONET response body outlived the call's total timeout",
+                    request=self.request,
+                ) from None
+            yield chunk
+
+    async def aclose(self):
+        await self.stream.aclose()
+
+
+class OnetClient:
+    """Shared async ONET web services client with keep-alive pooling and throttling."""
+
+    def __init__(
+        self,
+        base_url: str = ONET_API_BASE_URL,
+        username: str | None = API_USERNAME,
+        password: str | None = API_PASSWORD,
+        max_concurrency: int = ONET_MAX_CONCURRENCY,
+        rate_limit: float = ONET_RATE_LIMIT,
+        cache: ResponseCache | None = None,
+        request_timeout: float = ONET_REQUEST_TIMEOUT,
+        total_timeout: float = ONET_TOTAL_TIMEOUT,
+        max_retries: int = ONET_MAX_RETRIES,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.base_url = base_url
+        self.auth = (username or "", password or "")
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate_limiter = RateLimiter(rate_limit)
+        self.cache = cache or ResponseCache()
+        self.request_timeout = request_timeout
+        self.total_timeout = total_timeout
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Lazily create the pooled HTTP client on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=self.auth,
+                timeout=self.request_timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def stream(
+        self, path: str, params: dict | None = None, headers: dict | None = None
+    ):
+        """Open a streaming GET to an ONET resource, holding a concurrency slot until closed.
+
+        With the response cache enabled, fresh cached bodies are served from disk,
+        stale ones are revalidated, and in replay mode the network is never used.
+        A `304 Not Modified` answer to the caller's own conditional request is
+        passed through rather than raised.
+
+        Connection failures, timeouts and retryable statuses are retried with
+        jittered exponential backoff (or after the server's `Retry-After`) until
+        the call's total deadline, which also bounds reading the body: a body
+        still arriving when it passes raises `httpx.ReadTimeout`. Failures that
+        happen once the body is being read are the caller's to retry, since
+        part of it was already consumed.
+        """
+        cache = self.cache
+        key = entry = None
+        revalidating = False
+        if cache.enabled:
+            key = cache.key(f"{self.base_url}{path}", params)
+            entry = cache.lookup(key)
+            if entry and (cache.replay or cache.is_fresh(entry)):
+                ONET_CACHE_RESPONSES.inc("hit")
+                yield cache.response(entry)
+                return
+            if cache.replay:
+                ONET_CACHE_RESPONSES.inc("miss")
+                raise OnetCacheMiss(
+                    f"No cached ONET response for {path} in replay mode"
+                )
+            if entry and not headers:
+                headers = cache.conditional_headers(entry)
+                revalidating = True
+
+        deadline = time.monotonic() + self.total_timeout
+        attempt = 0
+        while True:
+            self.breaker.check()
+            retry_after = None
+            async with self._semaphore:
+                await self._rate_limiter.acquire()
+                # Each attempt gets the per-request timeout, cut short by the deadline
+                timeout = min(self.request_timeout, deadline - time.monotonic())
+                request = self.http.build_request(
+                    "GET",
+                    path,
+                    params=params,
+                    headers=headers,
+                    timeout=max(timeout, 0.001),
+                )
+                # Timed from the request leaving until the caller closes the body
+                start = time.perf_counter()
+                status = "error"
+                try:
+                    response = await self.http.send(request, stream=True)
+                except httpx.TransportError as error:
+                    failure = error
+                    ONET_REQUEST_DURATION.observe(time.perf_counter() - start, status)
+                else:
+                    status = response.status_code
+                    if status not in RETRY_STATUSES:
+                        self.breaker.record_success()
+                        try:
+                            if status == 304 and revalidating:
+                                ONET_CACHE_RESPONSES.inc("revalidated")
+                                cache.touch(key, entry)
+                                yield cache.response(entry)
+                                return
+
+                            if status != 304:
+                                response.raise_for_status()
+
+                            response.stream = DeadlineByteStream(
+                                response.stream, deadline, request
+                            )
+                            if key and status == 200:
+                                with cache.record(key, response):
+                                    yield response
+                            else:
+                                yield response
+                            return
+                        except httpx.TransportError:
+                            # The body was cut off after the response began
+                            self.breaker.record_failure()
+                            raise
+                        finally:
+                            await response.aclose()
+                            ONET_REQUEST_DURATION.observe(
+                                time.perf_counter() - start, status
+                            )
+
+                    retry_after = retry_after_seconds(
+                        response.headers.get("Retry-After")
+                    )
+                    await response.aclose()
+                    ONET_REQUEST_DURATION.observe(time.perf_counter() - start, status)
+                    failure = httpx.HTTPStatusError(
+                        f"ONET answered {status} for {path}",
+                        request=request,
+                        response=response,
+                    )
+
+            self.breaker.record_failure()
+            delay = retry_after
+            if delay is None:
+                delay = backoff_delay(attempt, ONET_BACKOFF_BASE, ONET_BACKOFF_MAX)
+            if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                raise failure
+            ONET_REQUEST_RETRIES.inc(str(status))
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Create a singleton ONET client shared by the ONET routers
+onet_client = OnetClient()
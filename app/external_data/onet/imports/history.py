@@ -0,0 +1,138 @@
+import base64
+import binascii
+import json
+from typing import Optional
+from fastapi import HTTPException
+from app.prisma import prisma
+from app.external_data.onet.ingest import ONET_TABLES
+
+
+def encode_code_cursor(code: str) -> str:
+    """Encode the last code of a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps([code]).encode()).decode()
+
+
+def decode_code_cursor(cursor: Optional[str]) -> str:
+    """Decode a cursor back into the code to continue after ("" for the first page)."""
+    if not cursor:
+        return ""
+    try:
+        (code,) = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(code)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def get_history_import(import_id: str):
+    """Fetch an import whose records can be read back, or raise 404/400."""
+    onet_import = await prisma.onetimport.find_unique(where={"id": import_id})
+    if not onet_import:
+        raise HTTPException(status_code=404, detail="Import not found")
+    if onet_import.kind is None:
+        raise HTTPException(
+            status_code=400, detail=f"Import {import_id} has no record kind"
+        )
+    return onet_import
+
+
+async def previous_import(onet_import):
+    """The last completed import of the same kind created before `onet_import`."""
+    previous = await prisma.onetimport.find_first(
+        where={
+            "kind": onet_import.kind,
+            "status": "completed",
+            "createdAt": {"lt": onet_import.createdAt},
+        },
+        order={"createdAt": "desc"},
+    )
+    if not previous:
+        raise HTTPException(
+            status_code=404, detail="No earlier completed import to compare with"
+        )
+    return previous
+
+
+async def records_source(onet_import, id_param: int, after_param: int) -> str:
+    """SQL selecting `(code, title)` of an import's records with codes after a cursor.
+
+    Imports snapshotted on completion are read from OnetImportEntry, with the
+    titles they had then. Others (failed imports, those whose snapshot failed
+    as recorded in `snapshotError`, or those from before snapshots) fall back
+    to the join table and current titles. Both reads
+    walk an index in code order, whatever the number of imports.
+    """
+    has_entries = await prisma.query_raw(
+        'SELECT EXISTS (SELECT 1 FROM "OnetImportEntry" WHERE "importId" = $1::uuid) AS found',
+        onet_import.id,
+    )
+    if has_entries[0]["found"]:
+        return (
+            'SELECT code, title FROM "OnetImportEntry" '
+            f'WHERE "importId" = ${id_param}::uuid AND code > ${after_param}'
+        )
+    table, join_table = ONET_TABLES[onet_import.kind]
+    return (
+        f'SELECT t.code, t.title FROM "{join_table}" AS j '
+        f'JOIN "{table}" AS t ON t.id = j."B" '
+        f'WHERE j."A" = ${id_param}::uuid AND t.code > ${after_param}'
+    )
+
+
+async def import_records(onet_import, limit: int, cursor: Optional[str] = None):
+    """Read one page of the records an import saw, ordered by code."""
+    source = await records_source(onet_import, 1, 2)
+    rows = await prisma.query_raw(
+        f"SELECT code, title FROM ({source}) AS records ORDER BY code LIMIT $3",
+        onet_import.id,
+        decode_code_cursor(cursor),
+        limit + 1,
+    )
+    return {
+        "items": rows[:limit],
+        "next_cursor": (
+            encode_code_cursor(rows[limit - 1]["code"]) if len(rows) > limit else None
+        ),
+    }
+
+
+async def import_changes(
+    base,
+    target,
+    limit: int,
+    cursor: Optional[str] = None,
+    change: Optional[str] = None,
+):
+    """Read one page of the codes added, removed or renamed from `base` to `target`.
+
+    The two record sets are full-joined on code in the database, so only the
+    differences (and only one page of them) leave it.
+    """
+    base_source = await records_source(base, 1, 3)
+    target_source = await records_source(target, 2, 3)
+    sql = (
+        "SELECT * FROM ("
+        "SELECT COALESCE(b.code, a.code) AS code, "
+        "CASE WHEN a.code IS NULL THEN 'added' "
+        "WHEN b.code IS NULL THEN 'removed' ELSE 'renamed' END AS change, "
+        'b.title AS title, a.title AS "previousTitle" '
+        f"FROM ({base_source}) AS a FULL JOIN ({target_source}) AS b "
+        "ON a.code = b.code "
+        "WHERE a.code IS NULL OR b.code IS NULL OR a.title <> b.title"
+        ") AS changes"
+    )
+    arguments = [base.id, target.id, decode_code_cursor(cursor)]
+    if change:
+        arguments.append(change)
+        sql += f" WHERE change = ${len(arguments)}"
+    arguments.append(limit + 1)
+    sql += f" ORDER BY code LIMIT ${len(arguments)}"
+
+    rows = await prisma.query_raw(sql, *arguments)
+    return {
+        "base": base.id,
+        "target": target.id,
+        "items": rows[:limit],
+        "next_cursor": (
+            encode_code_cursor(rows[limit - 1]["code"]) if len(rows) > limit else None
+        ),
+    }
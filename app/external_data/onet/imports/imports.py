@@ -1,40 +1,149 @@
-from fastapi import APIRouter, HTTPException
-from app.prisma import prisma, connect_prisma, disconnect_prisma
-from .schema import OnetImportModel
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.prisma import prisma
+from app.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, Page, paginate
+from app.export import export_response
+from app.serialization import RowEncoder, json_response
+from .jobs import import_jobs, import_progress
+from app.external_data.onet.cache import invalidate_onet_cache
+from app.external_data.onet.release import resolve_source
+from .retention import ONET_IMPORT_KEEP, ONET_IMPORT_KEEP_DAYS, prune_imports
+from .history import get_history_import, import_changes, import_records, previous_import
+from .schema import (
+    OnetImportDiffModel,
+    OnetImportModel,
+    OnetImportProgressModel,
+    OnetImportPrune,
+    OnetImportRecordModel,
+    OnetReleaseLoad,
+)
 
 # Initialize the router
 router = APIRouter(prefix="/v1/onetimports", tags=["ONET", "Imports", "Version 1"])
 
+# Encoder for import rows returned by the list endpoint
+import_encoder = RowEncoder(OnetImportModel)
 
-# Prisma connection and disconnection lifecycle events
-@router.on_event("startup")
-async def startup():
-    await connect_prisma()
 
+# Endpoint to get a page of Onet imports
+@router.get("/", response_model=Page[OnetImportModel])
+async def get_all_imports(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Fetch a page of imports from the OnetImport table, optionally limited to the comma-separated `fields`, ordered by creation time."""
+    encoder = import_encoder.select(fields)
+    imports = await paginate(prisma.onetimport, limit, cursor, encoder=encoder)
+    if not imports["items"] and cursor is None:
+        raise HTTPException(status_code=404, detail="No imports found")
+    return json_response(encoder.encode_page(imports))
 
-@router.on_event("shutdown")
-async def shutdown():
-    await disconnect_prisma()
 
+# Endpoint to export all Onet import records as NDJSON or CSV
+@router.get("/export")
+async def export_onet_imports(format: Literal["ndjson", "csv"] = "ndjson"):
+    """Stream every Onet import record as NDJSON or CSV using chunked database reads."""
+    return export_response(prisma.onetimport, OnetImportModel, format, "onet_imports")
 
-# Endpoint to get all Onet imports
-@router.get("/", response_model=list[OnetImportModel])
-async def get_all_imports():
-    """Fetch all imports from the OnetImport table."""
-    imports = await prisma.onetimport.find_many()
-    if not imports:
-        raise HTTPException(status_code=404, detail="No imports found")
-    return imports
+
+# Endpoint to bulk-load a local O*NET database release
+@router.post("/release", status_code=202)
+async def load_onet_release(release: OnetReleaseLoad):
+    """Queue one import per kind that COPY-loads records from a local O*NET release directory or zip, without calling the ONET API."""
+    source = resolve_source(release.source)
+    queued = []
+    for kind in dict.fromkeys(release.kinds):
+        import_record = await import_jobs.enqueue(kind, "release", source)
+        queued.append(
+            {
+                "kind": kind,
+                "import_id": import_record.id,
+                "status": import_record.status,
+            }
+        )
+    return {"message": f"{len(queued)} release import(s) queued", "imports": queued}
 
 
 # Endpoint to get a specific Onet import by ID
-@router.get("/{import_id}", response_model=OnetImportModel)
+@router.get("/{import_id}", response_model=OnetImportProgressModel)
 async def get_import(import_id: str):
-    """Fetch a specific import by its ID."""
+    """Fetch a specific import by its ID, including job progress and throughput."""
     onet_import = await prisma.onetimport.find_unique(where={"id": import_id})
     if not onet_import:
         raise HTTPException(status_code=404, detail="Import not found")
-    return onet_import
+    return {**onet_import.model_dump(), **import_progress(onet_import)}
+
+
+# Endpoint to delete every Onet import outside a retention policy
+@router.post("/prune")
+async def prune_onet_imports(policy: Optional[OnetImportPrune] = None):
+    """Delete finished imports that are neither among the newest `keep` of their kind nor younger than `keepDays`, in small batches; the newest completed import of each kind is always kept."""
+    policy = policy or OnetImportPrune()
+    keep = ONET_IMPORT_KEEP if policy.keep is None else policy.keep
+    keep_days = ONET_IMPORT_KEEP_DAYS if policy.keepDays is None else policy.keepDays
+    deleted = await prune_imports(keep, keep_days)
+    return {"message": f"{deleted} import(s) pruned.", "deleted": deleted}
+
+
+# Endpoint to get the records of an Onet import as they stood when it ran
+@router.get("/{import_id}/records", response_model=Page[OnetImportRecordModel])
+async def get_import_records(
+    import_id: str,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+):
+    """Fetch a page of the codes and titles an import saw, ordered by code."""
+    onet_import = await get_history_import(import_id)
+    return await import_records(onet_import, limit, cursor)
+
+
+# Endpoint to compare an Onet import with an earlier one
+@router.get("/{import_id}/diff", response_model=OnetImportDiffModel)
+async def get_import_diff(
+    import_id: str,
+    base: Optional[str] = None,
+    change: Optional[Literal["added", "removed", "renamed"]] = None,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+):
+    """Fetch a page of codes added, removed or renamed since the `base` import (by default the previous completed one of the same kind), ordered by code."""
+    target = await get_history_import(import_id)
+    if base:
+        base_import = await get_history_import(base)
+        if base_import.kind != target.kind:
+            raise HTTPException(
+                status_code=400, detail="Cannot compare imports of different kinds"
+            )
+    else:
+        base_import = await previous_import(target)
+    return await import_changes(base_import, target, limit, cursor, change)
+
+
+# Endpoint to resume a failed Onet import
+@router.post("/{import_id}/resume", status_code=202)
+async def resume_import(import_id: str):
+    """Requeue a failed import under the same ID; a full crawl continues after the last page window it committed, other modes rerun whole."""
+    onet_import = await prisma.onetimport.find_unique(where={"id": import_id})
+    if not onet_import:
+        raise HTTPException(status_code=404, detail="Import not found")
+    if onet_import.kind is None:
+        raise HTTPException(
+            status_code=400, detail=f"Import {import_id} has no record kind"
+        )
+    import_record = await import_jobs.resume(import_id)
+    if not import_record:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Import {import_id} is {onet_import.status}; only failed imports can resume",
+        )
+    invalidate_onet_cache(onet_import.kind)
+    return {
+        "message": f"Import {import_id} resumed",
+        "import_id": import_record.id,
+        "status": import_record.status,
+        "checkpoint": import_record.checkpointEnd,
+    }
 
 
 # Endpoint to delete a specific Onet import by ID
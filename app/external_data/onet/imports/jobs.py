@@ -0,0 +1,397 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from app.prisma import prisma
+from app.external_data.onet.cache import invalidate_onet_cache
+from app.external_data.onet.occupation.suggest import occupation_index
+from app.external_data.onet.ingest import (
+    IMPORT_TX_TIMEOUT,
+    connect_codes,
+    count_removed,
+    ingest_records,
+    snapshot_entries,
+)
+from app.external_data.onet.pagination import (
+    ONET_PAGE_SIZE,
+    ONET_SOURCES,
+    fetch_window,
+    iter_page_windows,
+)
+from app.external_data.onet.parser import OnetRecordParser
+from app.external_data.onet.release import load_release
+from app.external_data.onet.sync import crawl_delta, save_page_states
+from app.metrics.registry import (
+    ONET_IMPORT_DURATION,
+    ONET_IMPORT_ROWS,
+    ONET_IMPORT_THROUGHPUT,
+)
+
+log = logging.getLogger(__name__)
+
+# Job runner tuning, overridable through the environment
+ONET_IMPORT_WORKERS = int(os.getenv("ONET_IMPORT_WORKERS", "2"))
+ONET_IMPORT_BATCH_SIZE = int(os.getenv("ONET_IMPORT_BATCH_SIZE", "1000"))
+
+# Seconds between heartbeats of a running import, and seconds without one after
+# which it is failed as orphaned by a worker that died
+ONET_IMPORT_HEARTBEAT = float(os.getenv("ONET_IMPORT_HEARTBEAT", "30"))
+ONET_IMPORT_STALE_AFTER = float(os.getenv("ONET_IMPORT_STALE_AFTER", "300"))
+
+
+async def import_pages(kind: str, parser: OnetRecordParser, start: int, page_size: int):
+    """Yield the `(start, end, records)` page windows an import of the given kind reads."""
+    path, element, paginated = ONET_SOURCES[kind]
+    if paginated:
+        async for page in iter_page_windows(path, element, page_size, start, parser):
+            yield page
+        return
+
+    # Unpaginated listings are a single window, read again whole on resume
+    records = await fetch_window(path, element)
+    yield 1, len(records), records
+
+
+def import_progress(onet_import):
+    """Compute progress (0-1) and throughput (rows/second) for an import record."""
+    progress = None
+    if onet_import.totalRows:
+        progress = min(onet_import.processedRows / onet_import.totalRows, 1.0)
+    elif onet_import.status == "completed":
+        progress = 1.0
+
+    throughput = None
+    if onet_import.startedAt:
+        finished = onet_import.finishedAt or datetime.now(timezone.utc)
+        elapsed = (finished - onet_import.startedAt).total_seconds()
+        if elapsed > 0:
+            throughput = onet_import.processedRows / elapsed
+
+    return {"progress": progress, "throughput": throughput}
+
+
+class ImportJobRunner:
+    """In-process asyncio worker pool that runs queued ONET imports."""
+
+    def __init__(self, workers: int = ONET_IMPORT_WORKERS):
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._pending: set[str] = set()
+
+    async def start(self, recover: bool = True):
+        """Start the worker pool, first failing any jobs a previous process left unfinished.
+
+        Workers of a preforking server pass `recover=False`, since the master
+        recovers once before forking; a worker that starts later would otherwise
+        fail jobs its siblings had just queued.
+        """
+        if self._tasks:
+            return
+
+        if recover:
+            await self.recover()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._reaper()))
+
+    async def recover(self):
+        """Fail every queued or running import, orphaned by a server restart."""
+        await self._fail_interrupted({"status": {"in": ["queued", "running"]}})
+
+    async def stop(self):
+        """Cancel the worker pool, failing the jobs it had not finished."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._pending:
+            await self._fail_interrupted(
+                {
+                    "id": {"in": list(self._pending)},
+                    "status": {"in": ["queued", "running"]},
+                }
+            )
+            self._pending.clear()
+
+    async def reap_stale(self):
+        """Fail running imports whose heartbeat stopped, so they can be resumed.
+
+        A worker that dies mid-import leaves it running with no one to finish
+        or fail it; any process's runner notices once its heartbeat is stale.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=ONET_IMPORT_STALE_AFTER)
+        await self._fail_interrupted(
+            {"status": "running", "heartbeatAt": {"lt": cutoff}},
+            "Worker stopped reporting progress",
+        )
+
+    async def _reaper(self):
+        while True:
+            await asyncio.sleep(ONET_IMPORT_HEARTBEAT)
+            try:
+                await self.reap_stale()
+            except Exception:
+                log.exception("Failing stale ONET imports failed")
+
+    async def _heartbeat(self, import_id: str):
+        while True:
+            await asyncio.sleep(ONET_IMPORT_HEARTBEAT)
+            try:
+                await prisma.onetimport.update(
+                    where={"id": import_id},
+                    data={"heartbeatAt": datetime.now(timezone.utc)},
+                )
+            except Exception:
+                log.exception("Heartbeat of ONET import %s failed", import_id)
+
+    async def _fail_interrupted(
+        self, where: dict, error: str = "Interrupted before completion"
+    ):
+        await prisma.onetimport.update_many(
+            where=where,
+            data={
+                "status": "failed",
+                "error": error,
+                "finishedAt": datetime.now(timezone.utc),
+            },
+        )
+
+    async def create(self, kind: str, mode: str = "full", source: str | None = None):
+        """Create a queued import record."""
+        return await prisma.onetimport.create(
+            data={"kind": kind, "mode": mode, "status": "queued", "source": source}
+        )
+
+    async def enqueue(self, kind: str, mode: str = "full", source: str | None = None):
+        """Create a queued import record and hand it to the worker pool."""
+        import_record = await self.create(kind, mode, source)
+        self._pending.add(import_record.id)
+        await self.queue.put((import_record.id, kind, mode, source))
+        return import_record
+
+    async def resume(self, import_id: str):
+        """Requeue a failed import under its own record, or return None if it is not failed.
+
+        A full import continues after the last page window it committed.
+        """
+        resumed = await prisma.onetimport.update_many(
+            where={"id": import_id, "status": "failed"},
+            data={"status": "queued", "error": None, "finishedAt": None},
+        )
+        if not resumed:
+            return None
+
+        import_record = await prisma.onetimport.find_unique(where={"id": import_id})
+        self._pending.add(import_id)
+        await self.queue.put(
+            (import_id, import_record.kind, import_record.mode, import_record.source)
+        )
+        return import_record
+
+    async def _worker(self):
+        while True:
+            import_id, kind, mode, source = await self.queue.get()
+            try:
+                await self.run(import_id, kind, mode, source)
+            except Exception:
+                log.exception("ONET import %s failed", import_id)
+            finally:
+                self.queue.task_done()
+            # Left pending if cancelled mid-run, so `stop` marks it interrupted
+            self._pending.discard(import_id)
+
+    async def run(
+        self, import_id: str, kind: str, mode: str = "full", source: str | None = None
+    ):
+        """Run an import job, recording its status, counters and any error."""
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        import_record = await prisma.onetimport.update(
+            where={"id": import_id},
+            data={
+                "status": "running",
+                "startedAt": started_at,
+                "heartbeatAt": started_at,
+            },
+        )
+
+        heartbeat = asyncio.create_task(self._heartbeat(import_id))
+        try:
+            if mode == "delta":
+                summary = await self._run_delta(import_id, kind)
+            elif mode == "release":
+                summary = await self._run_release(import_id, kind, source)
+            else:
+                summary = await self._run_full(import_record, kind)
+            summary["snapshotError"] = await self._snapshot(kind, import_id)
+            summary["removedRows"] = await count_removed(prisma, kind, import_id)
+
+        except Exception as e:
+            ONET_IMPORT_DURATION.observe(
+                time.perf_counter() - start, kind, mode, "failed"
+            )
+            await prisma.onetimport.update(
+                where={"id": import_id},
+                data={
+                    "status": "failed",
+                    "error": str(getattr(e, "detail", e)),
+                    "finishedAt": datetime.now(timezone.utc),
+                },
+            )
+            raise
+
+        finally:
+            heartbeat.cancel()
+            # Batches may have been committed even if the job failed part way
+            invalidate_onet_cache(kind)
+            if kind == "occupation":
+                await occupation_index.refresh_since(started_at)
+
+        elapsed = time.perf_counter() - start
+        ONET_IMPORT_DURATION.observe(elapsed, kind, mode, "completed")
+        # Rows committed before a resume were not processed in this run
+        run_rows = summary["processedRows"] - summary.pop("resumedRows", 0)
+        if elapsed > 0:
+            ONET_IMPORT_THROUGHPUT.set(run_rows / elapsed, kind)
+
+        await prisma.onetimport.update(
+            where={"id": import_id},
+            data={
+                "status": "completed",
+                "finishedAt": datetime.now(timezone.utc),
+                **summary,
+            },
+        )
+
+    async def _snapshot(self, kind: str, import_id: str):
+        """Snapshot an import's entries, returning any error rather than raising it.
+
+        The import's rows are already committed, so a failed snapshot does not
+        fail it: its reads fall back to current titles, and the error is kept
+        on the import to say so.
+        """
+        try:
+            await snapshot_entries(prisma, kind, import_id)
+        except Exception as e:
+            log.exception(
+                "Snapshotting the entries of ONET import %s failed", import_id
+            )
+            return str(e)
+        return None
+
+    async def _run_full(self, import_record, kind: str):
+        """Stream every record from ONET and persist it in page-aligned batches.
+
+        Each batch is cut at a page boundary and commits, with its rows, the
+        last page window it covered and its per-page record counts. An import
+        resumed after a failure continues after that window with its counters.
+        """
+        import_id = import_record.id
+        parser = OnetRecordParser(ONET_SOURCES[kind][1])
+        resuming = ONET_SOURCES[kind][2] and import_record.checkpointEnd is not None
+        if resuming:
+            page_size = import_record.pageSize
+            start = import_record.checkpointEnd + 1
+            processed = resumed = import_record.processedRows
+            created = import_record.createdRows
+            updated = import_record.updatedRows
+            skipped = import_record.skippedRows
+            page_counts = list(import_record.pageCounts)
+        else:
+            page_size, start = ONET_PAGE_SIZE, 1
+            processed = resumed = created = updated = skipped = 0
+            page_counts = []
+
+        batch, batch_pages = [], []
+        pages = import_pages(kind, parser, start, page_size)
+        while True:
+            page = await anext(pages, None)
+            if page is not None:
+                if not page[2]:
+                    # Nothing past the checkpoint, e.g. a resume after the last page
+                    continue
+                batch.extend(page[2])
+                batch_pages.append(page)
+                if len(batch) < ONET_IMPORT_BATCH_SIZE:
+                    continue
+            if not batch_pages:
+                break
+
+            async with prisma.tx(timeout=IMPORT_TX_TIMEOUT) as transaction:
+                counts = await ingest_records(transaction, kind, import_id, batch)
+                processed += len(batch)
+                created += counts["created"]
+                updated += counts["updated"]
+                skipped += len(counts["skipped"])
+                page_counts.extend(len(records) for _, _, records in batch_pages)
+                await transaction.onetimport.update(
+                    where={"id": import_id},
+                    data={
+                        "totalRows": parser.total,
+                        "processedRows": processed,
+                        "createdRows": created,
+                        "updatedRows": updated,
+                        "skippedRows": skipped,
+                        "pageSize": page_size,
+                        "checkpointEnd": batch_pages[-1][1],
+                        "pageCounts": {"set": page_counts},
+                    },
+                )
+            ONET_IMPORT_ROWS.inc(kind, amount=len(batch))
+            batch, batch_pages = [], []
+
+        return {
+            "totalRows": parser.total or processed,
+            "processedRows": processed,
+            "unchangedRows": processed - created - updated - skipped,
+            "resumedRows": resumed,
+        }
+
+    async def _run_release(self, import_id: str, kind: str, source: str):
+        """Bulk-load a local O*NET release file with COPY instead of crawling the API."""
+        summary = await asyncio.to_thread(load_release, kind, import_id, source)
+        ONET_IMPORT_ROWS.inc(kind, amount=summary["processedRows"])
+        return summary
+
+    async def _run_delta(self, import_id: str, kind: str):
+        """Fetch only changed pages and write only new or retitled records."""
+        pages = await crawl_delta(kind)
+
+        # Every code still listed upstream, in page order
+        codes = list(dict.fromkeys(code for page in pages for code in page.codes))
+        changed = [record for page in pages if page.records for record in page.records]
+        changed_codes = {record["code"] for record in changed}
+
+        async with prisma.tx(timeout=IMPORT_TX_TIMEOUT) as transaction:
+            counts = await ingest_records(transaction, kind, import_id, changed)
+            await connect_codes(
+                transaction,
+                kind,
+                import_id,
+                [code for code in codes if code not in changed_codes],
+            )
+            # Pages with skipped codes keep their old state, so the next sync retries them
+            skipped = set(counts["skipped"])
+            await save_page_states(
+                transaction,
+                kind,
+                [page for page in pages if not skipped.intersection(page.codes)],
+            )
+        ONET_IMPORT_ROWS.inc(kind, amount=len(codes))
+
+        unchanged = len(codes) - counts["created"] - counts["updated"] - len(skipped)
+        return {
+            "totalRows": len(codes),
+            "processedRows": len(codes),
+            "createdRows": counts["created"],
+            "updatedRows": counts["updated"],
+            "unchangedRows": unchanged,
+            "skippedRows": len(skipped),
+            "skippedPages": sum(1 for page in pages if page.records is None),
+        }
+
+
+# Create a singleton job runner shared by the ONET routers
+import_jobs = ImportJobRunner()
@@ -0,0 +1,118 @@
+import os
+import random
+import asyncio
+import logging
+from app.prisma import prisma
+
+log = logging.getLogger(__name__)
+
+# Retention policy, overridable through the environment: an import is kept while it
+# is among the last ONET_IMPORT_KEEP of its kind or younger than ONET_IMPORT_KEEP_DAYS
+# (0 disables that rule; both 0 keeps everything)
+ONET_IMPORT_KEEP = int(os.getenv("ONET_IMPORT_KEEP", "50"))
+ONET_IMPORT_KEEP_DAYS = int(os.getenv("ONET_IMPORT_KEEP_DAYS", "30"))
+
+# Seconds between scheduled prunes, imports deleted per transaction, and seconds
+# to pause between transactions so other writers get the join tables in between
+ONET_PRUNE_INTERVAL = float(os.getenv("ONET_PRUNE_INTERVAL", "3600"))
+ONET_PRUNE_BATCH_SIZE = int(os.getenv("ONET_PRUNE_BATCH_SIZE", "10"))
+ONET_PRUNE_PAUSE = float(os.getenv("ONET_PRUNE_PAUSE", "0.1"))
+
+# Advisory lock key held by whichever process is deleting a batch
+PRUNE_LOCK_KEY = 74_650_023
+
+# Finished imports outside the policy, oldest first. The newest completed import
+# of each kind is always kept, since diffs and removal counts compare against it.
+PRUNABLE_IMPORTS_SQL = """
+SELECT id FROM (
+    SELECT id, status, "createdAt",
+        row_number() OVER (PARTITION BY kind ORDER BY "createdAt" DESC) AS position,
+        max("createdAt") FILTER (WHERE status = 'completed')
+            OVER (PARTITION BY kind) AS "latestCompleted"
+    FROM "OnetImport"
+) AS ranked
+WHERE status IN ('completed', 'failed')
+    AND "createdAt" IS DISTINCT FROM "latestCompleted"
+    AND ($1 = 0 OR position > $1)
+    AND ($2 = 0 OR "createdAt" < now() - $2::float8 * interval '1 day')
+ORDER BY "createdAt"
+LIMIT $3
+"""
+
+
+async def prune_batch(keep: int, keep_days: int, batch_size: int) -> int | None:
+    """Delete one batch of prunable imports in a short transaction.
+
+    Deleting an import cascades to its join table and entry rows. Returns the
+    number deleted, or None if another process holds the prune lock.
+    """
+    async with prisma.tx() as transaction:
+        locked = await transaction.query_raw(
+            "SELECT pg_try_advisory_xact_lock($1) AS locked", PRUNE_LOCK_KEY
+        )
+        if not locked[0]["locked"]:
+            return None
+        rows = await transaction.query_raw(
+            PRUNABLE_IMPORTS_SQL, keep, keep_days, batch_size
+        )
+        if not rows:
+            return 0
+        return await transaction.onetimport.delete_many(
+            where={"id": {"in": [row["id"] for row in rows]}}
+        )
+
+
+async def prune_imports(
+    keep: int = ONET_IMPORT_KEEP,
+    keep_days: int = ONET_IMPORT_KEEP_DAYS,
+    batch_size: int = ONET_PRUNE_BATCH_SIZE,
+) -> int:
+    """Delete every import outside the retention policy, one batch at a time."""
+    if not keep and not keep_days:
+        return 0
+
+    deleted = 0
+    while True:
+        count = await prune_batch(keep, keep_days, batch_size)
+        if not count:
+            return deleted
+        deleted += count
+        await asyncio.sleep(ONET_PRUNE_PAUSE)
+
+
+class ImportPruner:
+    """Background task enforcing the retention policy on a schedule.
+
+    Every worker process runs one; the advisory lock keeps them from deleting
+    the same batch twice.
+    """
+
+    def __init__(self, interval: float = ONET_PRUNE_INTERVAL):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None and (ONET_IMPORT_KEEP or ONET_IMPORT_KEEP_DAYS):
+            self._task = asyncio.create_task(self._prune())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _prune(self):
+        while True:
+            # Spread workers' runs apart rather than have them contend at once
+            await asyncio.sleep(self.interval * random.uniform(0.9, 1.1))
+            try:
+                deleted = await prune_imports()
+                if deleted:
+                    log.info("Pruned %d ONET imports", deleted)
+            except Exception:
+                log.exception("Pruning ONET imports failed")
+
+
+# Create a singleton pruner, started with the app
+import_pruner = ImportPruner()
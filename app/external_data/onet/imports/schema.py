@@ -1,12 +1,73 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import Literal, Optional
 
 
 # Schema for displaying OnetImport data
 class OnetImportModel(BaseModel):
     id: str
+    kind: Optional[str] = None
+    mode: str
+    status: str
+    totalRows: Optional[int] = None
+    processedRows: int
+    createdRows: int
+    updatedRows: int
+    removedRows: int
+    unchangedRows: int
+    skippedPages: int
+    skippedRows: int = 0  # Records not stored because they conflicted with stored rows
+    error: Optional[str] = None
+    snapshotError: Optional[str] = None  # Set when reads fall back to current titles
+    source: Optional[str] = None  # Release file an offline import was loaded from
+    pageSize: Optional[int] = None  # Page size a full crawl requested
+    checkpointEnd: Optional[int] = None  # End of the last page window committed
+    pageCounts: list[int] = []  # Records in each committed page, in order
+    startedAt: Optional[datetime] = None
+    heartbeatAt: Optional[datetime] = None  # Last progress report of a running import
+    finishedAt: Optional[datetime] = None
     createdAt: datetime
     updatedAt: datetime
 
     class Config:
         from_attributes = True
+
+
+# Schema for reporting the progress of a single OnetImport job
+class OnetImportProgressModel(OnetImportModel):
+    progress: Optional[float] = None  # Fraction of rows processed, 0 to 1
+    throughput: Optional[float] = None  # Rows processed per second
+
+
+# Schema for one ONET record as an import saw it
+class OnetImportRecordModel(BaseModel):
+    code: str
+    title: str
+
+
+# Schema for one code that differs between two imports
+class OnetImportChangeModel(BaseModel):
+    code: str
+    change: Literal["added", "removed", "renamed"]
+    title: Optional[str] = None  # Title in the compared import, None if removed
+    previousTitle: Optional[str] = None  # Title in the base import, None if added
+
+
+# Schema for a page of differences between two imports
+class OnetImportDiffModel(BaseModel):
+    base: str
+    target: str
+    items: list[OnetImportChangeModel]
+    next_cursor: Optional[str] = None
+
+
+# Schema for bulk-loading a local O*NET database release
+class OnetReleaseLoad(BaseModel):
+    source: str  # Release directory or .zip archive, relative to ONET_RELEASE_DIR
+    kinds: list[Literal["occupation", "industry"]] = ["occupation", "industry"]
+
+
+# Schema for pruning imports outside a retention policy, defaulting to the configured one
+class OnetImportPrune(BaseModel):
+    keep: Optional[int] = Field(None, ge=0)  # Newest imports of each kind to keep
+    keepDays: Optional[int] = Field(None, ge=0)  # Keep imports younger than this
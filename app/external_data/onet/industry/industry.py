@@ -1,8 +1,23 @@
-import os
-import requests
-from fastapi import APIRouter, HTTPException
-from requests.auth import HTTPBasicAuth
-from app.prisma import prisma, connect_prisma, disconnect_prisma
+import math
+import httpx
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.prisma import prisma
+from app.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    Page,
+    paginate,
+    title_filter,
+)
+from app.export import export_response
+from app.serialization import RowEncoder, json_response
+from app.projection import find_unique
+from app.external_data.onet.cache import invalidate_onet_cache, onet_caches
+from app.external_data.onet.client import OnetUnavailable
+from app.external_data.onet.imports.jobs import import_jobs
+from app.external_data.onet.pagination import fetch_window
+from app.external_data.onet.sync import forget_pages
 from .schema import OnetIndustryAPISchema, OnetIndustryModel
 from datetime import datetime
 
@@ -11,51 +26,29 @@ router = APIRouter(
     prefix="/v1/onetindustries", tags=["ONET", "ONET Industries", "Version 1"]
 )
 
-# ONET API credentials
-API_USERNAME = os.getenv("ONET_USERNAME")
-API_PASSWORD = os.getenv("ONET_PASSWORD")
-ONET_API_BASE_URL = "https://services.onetcenter.org/ws/online"
-
-
-# Prisma connection and disconnection lifecycle events
-@router.on_event("startup")
-async def startup():
-    await connect_prisma()
+# Read-through cache for this router's reference data
+industry_cache = onet_caches["industry"]
 
-
-@router.on_event("shutdown")
-async def shutdown():
-    await disconnect_prisma()
+# Encoder for industry rows returned by the read endpoints
+industry_encoder = RowEncoder(OnetIndustryModel)
 
 
 # Helper function to fetch industries from ONET API and handle XML response
-def fetch_all_industries():
-    """Fetch all industries from ONET API."""
-    url = f"{ONET_API_BASE_URL}/industries"
-
+async def fetch_all_industries():
+    """Fetch all industries from ONET API, parsing the XML as it streams in."""
     try:
-        response = requests.get(url, auth=HTTPBasicAuth(API_USERNAME, API_PASSWORD))
-        response.raise_for_status()
-
-        industries = []
-        if "xml" in response.headers.get("Content-Type", "").lower():
-            import xml.etree.ElementTree as ET
-
-            root = ET.fromstring(response.content)
-            for industry in root.findall(".//industry"):
-                code = industry.find("code").text
-                title = industry.find("title").text
-                industries.append({"code": code, "title": title})
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail="Invalid response format from O*NET (expected XML)",
-            )
-        return industries
-
-    except requests.exceptions.RequestException as e:
+        return await fetch_window("/industries", "industry")
+
+    except OnetUnavailable as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"ONET is unavailable: {e}",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
+    except httpx.HTTPError as e:
         raise HTTPException(
-            status_code=500, detail=f"Error fetching industries from ONET: {e}"
+            status_code=502, detail=f"Error fetching industries from ONET: {e}"
         )
 
 
@@ -63,69 +56,84 @@ def fetch_all_industries():
 @router.get("/fetch", response_model=list[OnetIndustryAPISchema])
 async def fetch_onet_industries():
     """Fetch industries from ONET API without saving to the database."""
-    industries = fetch_all_industries()
+    industries = await fetch_all_industries()
     return industries
 
 
 # Endpoint to save all industries from ONET API to the database
-@router.post("/save")
-async def save_onet_industries():
-    """Fetch industries from ONET API and save them to the local database, associating them with a new import record."""
-    try:
-        industries = fetch_all_industries()
-
-        # Create a new OnetImport record
-        import_record = await prisma.onetimport.create(data={})
-
-        for industry in industries:
-            # Check if the industry already exists in the database by its unique code
-            existing_industry = await prisma.onetindustry.find_unique(
-                where={"code": industry["code"]}
-            )
-
-            if existing_industry:
-                # Associate the existing industry with the new import
-                await prisma.onetimport.update(
-                    where={"id": import_record.id},
-                    data={"industries": {"connect": [{"id": existing_industry.id}]}},
-                )
-            else:
-                # Create a new industry entry and associate it with the new import
-                new_industry = await prisma.onetindustry.create(
-                    data={"title": industry["title"], "code": industry["code"]}
-                )
-                await prisma.onetimport.update(
-                    where={"id": import_record.id},
-                    data={"industries": {"connect": [{"id": new_industry.id}]}},
-                )
-
-        return {
-            "message": f"Industries saved successfully and associated with import {import_record.id}",
-            "import_id": import_record.id,
-        }
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Error saving industries: {str(e)}"
-        )
-
-
-# Endpoint to get all industries saved in the local database
-@router.get("/", response_model=list[OnetIndustryModel])
-async def get_saved_industries():
-    """Fetch all industries that have been saved to the local database."""
-    industries = await prisma.onetindustry.find_many()
-    return industries
+@router.post("/save", status_code=202)
+async def save_onet_industries(mode: Literal["full", "delta"] = "full"):
+    """Queue a background job that fetches all industries from ONET API and saves them to the local database under a new import record.
+
+    A `delta` import only downloads pages that changed since the last sync and only writes new or retitled industries.
+    """
+    import_record = await import_jobs.enqueue("industry", mode)
+    return {
+        "message": f"Industry import {import_record.id} queued",
+        "import_id": import_record.id,
+        "status": import_record.status,
+    }
+
+
+# Endpoint to get a page of industries saved in the local database
+@router.get("/", response_model=Page[OnetIndustryModel])
+async def get_saved_industries(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Fetch a page of industries that have been saved to the local database, optionally filtered by title or code prefix and limited to the comma-separated `fields`, ordered by creation time."""
+    encoder = industry_encoder.select(fields)
+    industries = await industry_cache.get_or_load(
+        ("list", limit, cursor, q, encoder.fields),
+        lambda: paginate(prisma.onetindustry, limit, cursor, title_filter(q), encoder),
+    )
+    return json_response(encoder.encode_page(industries))
+
+
+# Endpoint to export all ONET industry records as NDJSON or CSV
+@router.get("/export")
+async def export_onet_industries(format: Literal["ndjson", "csv"] = "ndjson"):
+    """Stream every ONET industry record as NDJSON or CSV using chunked database reads."""
+    return export_response(
+        prisma.onetindustry, OnetIndustryModel, format, "onet_industries"
+    )
+
+
+# Endpoint to report ONET industry cache metrics
+@router.get("/cache/stats")
+async def get_onet_industry_cache_stats():
+    """Report hit/miss metrics for the in-process ONET industry cache."""
+    return industry_cache.stats()
+
+
+# Endpoint to get a specific ONET industry by its O*NET code
+@router.get("/code/{code}", response_model=OnetIndustryModel)
+async def get_onet_industry_by_code(code: str, fields: Optional[str] = None):
+    """Fetch a specific ONET industry by its O*NET code, optionally limited to the comma-separated `fields`."""
+    encoder = industry_encoder.select(fields)
+    industry = await industry_cache.get_or_load(
+        ("code", code, encoder.fields),
+        lambda: find_unique(prisma.onetindustry, encoder, {"code": code}),
+    )
+    if not industry:
+        raise HTTPException(status_code=404, detail="ONET Industry not found")
+    return json_response(encoder.encode_row(industry))
 
 
 # Endpoint to get a specific ONET industry by ID
 @router.get("/{industry_id}", response_model=OnetIndustryModel)
-async def get_onet_industry(industry_id: str):
-    """Fetch a specific ONET industry by its ID."""
-    industry = await prisma.onetindustry.find_unique(where={"id": industry_id})
+async def get_onet_industry(industry_id: str, fields: Optional[str] = None):
+    """Fetch a specific ONET industry by its ID, optionally limited to the comma-separated `fields`."""
+    encoder = industry_encoder.select(fields)
+    industry = await industry_cache.get_or_load(
+        ("id", industry_id, encoder.fields),
+        lambda: find_unique(prisma.onetindustry, encoder, {"id": industry_id}),
+    )
     if not industry:
         raise HTTPException(status_code=404, detail="ONET Industry not found")
-    return industry
+    return json_response(encoder.encode_row(industry))
 
 
 # Endpoint to delete a specific ONET industry by ID
@@ -135,6 +143,8 @@ async def delete_onet_industry(industry_id: str):
     industry = await prisma.onetindustry.delete(where={"id": industry_id})
     if not industry:
         raise HTTPException(status_code=404, detail="ONET Industry not found")
+    invalidate_onet_cache("industry")
+    await forget_pages("industry", [industry.code])
     return {"message": f"Industry {industry_id} deleted successfully."}
 
 
@@ -143,4 +153,6 @@ async def delete_onet_industry(industry_id: str):
 async def delete_all_onet_industries():
     """Delete all ONET industries from the system."""
     await prisma.onetindustry.delete_many()
+    await forget_pages("industry")
+    invalidate_onet_cache("industry")
     return {"message": "All ONET industries deleted successfully."}
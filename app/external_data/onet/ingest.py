@@ -0,0 +1,209 @@
+import logging
+from datetime import timedelta
+
+log = logging.getLogger(__name__)
+
+# Map each ONET record kind to its Prisma delegate and OnetImport relation field
+ONET_KINDS = {
+    "occupation": ("onetoccupation", "occupations"),
+    "industry": ("onetindustry", "industries"),
+}
+
+# Map each ONET record kind to its table and implicit OnetImport join table,
+# for the queries written in raw SQL
+ONET_TABLES = {
+    "occupation": ("OnetOccupation", "_OnetImportOccupations"),
+    "industry": ("OnetIndustry", "_OnetImportIndustries"),
+}
+
+# Upper bound for a single batch transaction
+IMPORT_TX_TIMEOUT = timedelta(seconds=60)
+
+
+def dedupe_records(records):
+    """Deduplicate ONET records by code, keeping the first occurrence."""
+    unique = {}
+    for record in records:
+        unique.setdefault(record["code"], record)
+    return unique
+
+
+# Title a retitled row holds while titles are swapped between rows, unique by ID
+PARKED_TITLE = "'parked:' || id::text"
+
+
+def plan_retitles(existing, unique, holders):
+    """Choose which existing rows can take their new titles without a unique conflict.
+
+    `holders` are the stored rows currently holding one of the new titles. A
+    title held by a row retitled in the same batch is freed by it; one held
+    by any other row blocks the retitle. A blocked row keeps its old title,
+    which may in turn block another. Returns the retitles that can run, as
+    row IDs mapped to titles, and the codes of those that cannot.
+    """
+    retitles = {}
+    kept = []
+    claimed = set()
+    for row in existing:
+        title = unique[row.code]["title"]
+        if row.title == title:
+            continue
+        if title in claimed:
+            # Two codes asked for the same title; the first one gets it
+            kept.append(row)
+        else:
+            claimed.add(title)
+            retitles[row.id] = (row, title)
+
+    blocked = {row.title for row in holders if row.id not in retitles}
+    blocked.update(row.title for row in kept)
+    while True:
+        clashes = [
+            row_id for row_id, (_, title) in retitles.items() if title in blocked
+        ]
+        if not clashes:
+            break
+        for row_id in clashes:
+            row, _ = retitles.pop(row_id)
+            kept.append(row)
+            blocked.add(row.title)
+
+    titles = {row_id: title for row_id, (_, title) in retitles.items()}
+    return titles, [row.code for row in kept]
+
+
+async def update_titles(client, kind, titles, park: bool = False):
+    """Retitle existing rows in one statement; `titles` maps row IDs to new titles.
+
+    With `park`, the rows first move to placeholder titles, so titles can be
+    swapped or passed along between them without a unique conflict.
+    """
+    if not titles:
+        return 0
+    table, _ = ONET_TABLES[kind]
+    if park:
+        ids = ", ".join(f"${param}::uuid" for param in range(1, len(titles) + 1))
+        await client.execute_raw(
+            f'UPDATE "{table}" SET title = {PARKED_TITLE} WHERE id IN ({ids})',
+            *titles,
+        )
+    values = ", ".join(
+        f"(${param}::uuid, ${param + 1})" for param in range(1, 2 * len(titles), 2)
+    )
+    return await client.execute_raw(
+        f'UPDATE "{table}" AS t SET title = v.title, "updatedAt" = now() '
+        f"FROM (VALUES {values}) AS v (id, title) WHERE t.id = v.id",
+        *[value for pair in titles.items() for value in pair],
+    )
+
+
+async def ingest_records(client, kind, import_id, records):
+    """Write a batch of ONET records and connect them to an import in a handful of queries.
+
+    New codes are inserted with `create_many`, existing rows whose title changed
+    are retitled in one statement, and the whole batch is connected in one
+    relation write. Codes that could not be inserted or retitled (their title
+    is held by another code) are logged and returned as `skipped`.
+    """
+    delegate_name, relation = ONET_KINDS[kind]
+    delegate = getattr(client, delegate_name)
+
+    unique = dedupe_records(records)
+    if not unique:
+        return {"created": 0, "updated": 0, "existing": 0, "skipped": []}
+
+    # Diff the incoming codes against existing rows in a single query
+    existing = await delegate.find_many(where={"code": {"in": list(unique)}})
+    existing_codes = {row.code for row in existing}
+    new_codes = [code for code in unique if code not in existing_codes]
+
+    # Update only the existing rows whose title changed upstream, leaving out
+    # those whose new title another row keeps
+    wanted = [unique[row.code]["title"] for row in existing]
+    holders = await delegate.find_many(where={"title": {"in": wanted}})
+    titles, skipped = plan_retitles(existing, unique, holders)
+    updated = await update_titles(
+        client,
+        kind,
+        titles,
+        park=any(holder.id in titles for holder in holders),
+    )
+
+    # Write all new rows at once, then read back their IDs for the relation write
+    created = []
+    if new_codes:
+        await delegate.create_many(
+            data=[{"code": code, "title": unique[code]["title"]} for code in new_codes],
+            skip_duplicates=True,
+        )
+        created = await delegate.find_many(where={"code": {"in": new_codes}})
+
+    # `skip_duplicates` drops conflicting rows silently; name the codes it dropped
+    if len(created) < len(new_codes):
+        stored = {row.code for row in created}
+        skipped.extend(code for code in new_codes if code not in stored)
+    if skipped:
+        log.warning(
+            "Skipped %d ONET %s record(s) conflicting with stored rows: %s",
+            len(skipped),
+            kind,
+            ", ".join(skipped),
+        )
+
+    # Connect the whole batch to the import record in one relation write
+    rows = [*existing, *created]
+    await client.onetimport.update(
+        where={"id": import_id},
+        data={relation: {"connect": [{"id": row.id} for row in rows]}},
+    )
+
+    return {
+        "created": len(created),
+        "updated": updated,
+        "existing": len(existing),
+        "skipped": skipped,
+    }
+
+
+async def connect_codes(client, kind, import_id, codes):
+    """Connect already-stored records to an import by code in one relation write."""
+    _, relation = ONET_KINDS[kind]
+    if codes:
+        await client.onetimport.update(
+            where={"id": import_id},
+            data={relation: {"connect": [{"code": code} for code in codes]}},
+        )
+
+
+async def count_removed(client, kind, import_id):
+    """Count records in the previous completed import of this kind that this import dropped."""
+    delegate_name, _ = ONET_KINDS[kind]
+    previous = await client.onetimport.find_first(
+        where={"kind": kind, "status": "completed", "id": {"not": import_id}},
+        order={"createdAt": "desc"},
+    )
+    if not previous:
+        return 0
+
+    return await getattr(client, delegate_name).count(
+        where={
+            "imports": {"some": {"id": previous.id}},
+            "NOT": [{"imports": {"some": {"id": import_id}}}],
+        }
+    )
+
+
+async def snapshot_entries(client, kind, import_id):
+    """Record the code and current title of every record connected to an import.
+
+    The join tables only point at rows whose titles change in place, so this
+    copy is what lets later diffs and as-of reads see titles as they were.
+    """
+    table, join_table = ONET_TABLES[kind]
+    return await client.execute_raw(
+        'INSERT INTO "OnetImportEntry" ("importId", code, title) '
+        f'SELECT j."A", t.code, t.title FROM "{join_table}" AS j '
+        f'JOIN "{table}" AS t ON t.id = j."B" WHERE j."A" = $1::uuid '
+        "ON CONFLICT DO NOTHING",
+        import_id,
+    )
@@ -1,85 +1,54 @@
-import os
-import requests
-from fastapi import APIRouter, HTTPException
-from requests.auth import HTTPBasicAuth
-from app.prisma import prisma, connect_prisma, disconnect_prisma
+import math
+import httpx
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.prisma import prisma
+from app.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    Page,
+    paginate,
+    title_filter,
+)
+from app.export import export_response
+from app.serialization import RowEncoder, json_response
+from app.projection import find_unique
+from app.external_data.onet.cache import invalidate_onet_cache, onet_caches
+from app.external_data.onet.client import OnetUnavailable
+from app.external_data.onet.imports.jobs import import_jobs
+from app.external_data.onet.pagination import fetch_all_pages
+from app.external_data.onet.sync import forget_pages
+from .suggest import occupation_index
 from .schema import OnetOccupationAPISchema, OnetOccupationModel
-import xml.etree.ElementTree as ET
 
 # Initialize the router
 router = APIRouter(
     prefix="/v1/onetoccupations", tags=["ONET", "ONET Occupations", "Version 1"]
 )
 
-# ONET API credentials
-API_USERNAME = os.getenv("ONET_USERNAME")
-API_PASSWORD = os.getenv("ONET_PASSWORD")
-ONET_API_BASE_URL = "https://services.onetcenter.org/ws/online"
-
-
-# Prisma connection and disconnection lifecycle events
-@router.on_event("startup")
-async def startup():
-    await connect_prisma()
+# Read-through cache for this router's reference data
+occupation_cache = onet_caches["occupation"]
 
-
-@router.on_event("shutdown")
-async def shutdown():
-    await disconnect_prisma()
+# Encoder for occupation rows returned by the read endpoints
+occupation_encoder = RowEncoder(OnetOccupationModel)
 
 
 # Helper function to fetch occupations from ONET API and handle pagination
-def fetch_all_occupations():
-    """Fetch all occupations from ONET API with pagination."""
-    url = f"{ONET_API_BASE_URL}/occupations"
-    occupations = []
-    page = 1
-    page_size = 20  # ONET returns 20 results per request by default
-
+async def fetch_all_occupations():
+    """Fetch all occupations from ONET API, fanning out over every page window."""
     try:
-        while True:
-            # Make request with pagination parameters
-            response = requests.get(
-                url,
-                params={"start": (page - 1) * page_size + 1, "end": page * page_size},
-                auth=HTTPBasicAuth(API_USERNAME, API_PASSWORD),
-            )
-            response.raise_for_status()
-
-            if "xml" in response.headers.get("Content-Type", "").lower():
-                # Parse XML response
-                root = ET.fromstring(response.content)
-
-                # Extract occupations from the XML response
-                occupations_on_page = []
-                for occupation in root.findall(".//occupation"):
-                    code = occupation.find("code").text
-                    title = occupation.find("title").text
-                    occupations_on_page.append({"code": code, "title": title})
-
-                # Break the loop if no more occupations are returned
-                if not occupations_on_page:
-                    break
-
-                occupations.extend(occupations_on_page)
-
-                # If fewer than 20 occupations were returned, stop pagination
-                if len(occupations_on_page) < page_size:
-                    break
-
-                page += 1  # Move to the next page
-
-            else:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Invalid response format from O*NET (expected XML)",
-                )
-
-        return occupations
-
-    except requests.exceptions.RequestException as e:
+        return await fetch_all_pages("/occupations", "occupation")
+
+    except OnetUnavailable as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"ONET is unavailable: {e}",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
+    except httpx.HTTPError as e:
         raise HTTPException(
-            status_code=500, detail=f"Error fetching occupations from ONET: {e}"
+            status_code=502, detail=f"Error fetching occupations from ONET: {e}"
         )
 
 
@@ -87,68 +56,94 @@ def fetch_all_occupations():
 @router.get("/fetch", response_model=list[OnetOccupationAPISchema])
 async def fetch_onet_occupations():
     """Fetch occupations from ONET API without saving to the database."""
-    occupations = fetch_all_occupations()
+    occupations = await fetch_all_occupations()
     return occupations
 
 
-@router.post("/save")
-async def save_onet_occupations():
-    """Fetch all occupations from ONET API and save them to the local database, associating them with a new import record."""
-    try:
-        occupations = fetch_all_occupations()
-
-        # Create a new OnetImport record
-        import_record = await prisma.onetimport.create(data={})
-
-        for occupation in occupations:
-            # Check if the occupation already exists in the database by its unique code
-            existing_occupation = await prisma.onetoccupation.find_unique(
-                where={"code": occupation["code"]}
-            )
-
-            if existing_occupation:
-                # Associate the existing occupation with the new import
-                await prisma.onetimport.update(
-                    where={"id": import_record.id},
-                    data={"occupations": {"connect": [{"id": existing_occupation.id}]}},
-                )
-            else:
-                # Create a new occupation entry and associate it with the new import
-                new_occupation = await prisma.onetoccupation.create(
-                    data={"title": occupation["title"], "code": occupation["code"]}
-                )
-                await prisma.onetimport.update(
-                    where={"id": import_record.id},
-                    data={"occupations": {"connect": [{"id": new_occupation.id}]}},
-                )
-
-        return {
-            "message": f"Occupations saved successfully and associated with import {import_record.id}",
-            "import_id": import_record.id,
-        }
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Error saving occupations: {str(e)}"
-        )
-
-
-# Endpoint to get all occupations saved in the local database
-@router.get("/", response_model=list[OnetOccupationModel])
-async def get_saved_occupations():
-    """Fetch all occupations that have been saved to the local database."""
-    occupations = await prisma.onetoccupation.find_many()
-    return occupations
+@router.post("/save", status_code=202)
+async def save_onet_occupations(mode: Literal["full", "delta"] = "full"):
+    """Queue a background job that fetches all occupations from ONET API and saves them to the local database under a new import record.
+
+    A `delta` import only downloads pages that changed since the last sync and only writes new or retitled occupations.
+    """
+    import_record = await import_jobs.enqueue("occupation", mode)
+    return {
+        "message": f"Occupation import {import_record.id} queued",
+        "import_id": import_record.id,
+        "status": import_record.status,
+    }
+
+
+# Endpoint to get a page of occupations saved in the local database
+@router.get("/", response_model=Page[OnetOccupationModel])
+async def get_saved_occupations(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Fetch a page of occupations that have been saved to the local database, optionally filtered by title or code prefix and limited to the comma-separated `fields`, ordered by creation time."""
+    encoder = occupation_encoder.select(fields)
+    occupations = await occupation_cache.get_or_load(
+        ("list", limit, cursor, q, encoder.fields),
+        lambda: paginate(
+            prisma.onetoccupation, limit, cursor, title_filter(q), encoder
+        ),
+    )
+    return json_response(encoder.encode_page(occupations))
+
+
+# Endpoint to export all ONET occupation records as NDJSON or CSV
+@router.get("/export")
+async def export_onet_occupations(format: Literal["ndjson", "csv"] = "ndjson"):
+    """Stream every ONET occupation record as NDJSON or CSV using chunked database reads."""
+    return export_response(
+        prisma.onetoccupation, OnetOccupationModel, format, "onet_occupations"
+    )
+
+
+# Endpoint to autocomplete ONET occupations by code or title prefix
+@router.get("/suggest", response_model=list[OnetOccupationAPISchema])
+async def suggest_onet_occupations(
+    prefix: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=100)
+):
+    """Suggest ONET occupations whose code, title or a title word starts with the prefix, served from memory."""
+    return occupation_index.suggest(prefix, limit)
+
+
+# Endpoint to report ONET occupation cache metrics
+@router.get("/cache/stats")
+async def get_onet_occupation_cache_stats():
+    """Report hit/miss metrics for the in-process ONET occupation cache."""
+    return occupation_cache.stats()
+
+
+# Endpoint to get a specific ONET occupation by its O*NET code
+@router.get("/code/{code}", response_model=OnetOccupationModel)
+async def get_onet_occupation_by_code(code: str, fields: Optional[str] = None):
+    """Fetch a specific ONET occupation by its O*NET code, optionally limited to the comma-separated `fields`."""
+    encoder = occupation_encoder.select(fields)
+    occupation = await occupation_cache.get_or_load(
+        ("code", code, encoder.fields),
+        lambda: find_unique(prisma.onetoccupation, encoder, {"code": code}),
+    )
+    if not occupation:
+        raise HTTPException(status_code=404, detail="ONET Occupation not found")
+    return json_response(encoder.encode_row(occupation))
 
 
 # Endpoint to get a specific ONET occupation by ID
 @router.get("/{occupation_id}", response_model=OnetOccupationModel)
-async def get_onet_occupation(occupation_id: str):
-    """Fetch a specific ONET occupation by its ID."""
-    occupation = await prisma.onetoccupation.find_unique(where={"id": occupation_id})
+async def get_onet_occupation(occupation_id: str, fields: Optional[str] = None):
+    """Fetch a specific ONET occupation by its ID, optionally limited to the comma-separated `fields`."""
+    encoder = occupation_encoder.select(fields)
+    occupation = await occupation_cache.get_or_load(
+        ("id", occupation_id, encoder.fields),
+        lambda: find_unique(prisma.onetoccupation, encoder, {"id": occupation_id}),
+    )
     if not occupation:
         raise HTTPException(status_code=404, detail="ONET Occupation not found")
-    return occupation
+    return json_response(encoder.encode_row(occupation))
 
 
 # Endpoint to delete a specific ONET occupation by ID
@@ -158,6 +153,9 @@ async def delete_onet_occupation(occupation_id: str):
     occupation = await prisma.onetoccupation.delete(where={"id": occupation_id})
     if not occupation:
         raise HTTPException(status_code=404, detail="ONET Occupation not found")
+    invalidate_onet_cache("occupation")
+    occupation_index.remove([occupation.code])
+    await forget_pages("occupation", [occupation.code])
     return {"message": f"Occupation {occupation_id} deleted successfully."}
 
 
@@ -166,4 +164,7 @@ async def delete_onet_occupation(occupation_id: str):
 async def delete_all_onet_occupations():
     """Delete all ONET occupations from the system."""
     await prisma.onetoccupation.delete_many()
+    await forget_pages("occupation")
+    invalidate_onet_cache("occupation")
+    occupation_index.clear()
     return {"message": "All ONET occupations deleted successfully."}
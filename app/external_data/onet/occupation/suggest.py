@@ -0,0 +1,100 @@
+import re
+from bisect import bisect_left, insort
+from datetime import datetime
+from app.prisma import prisma
+
+# Split titles into words so "dev" matches "Software Developers"
+WORD_BOUNDARY = re.compile(r"[\s/,()-]+")
+
+
+def index_keys(code: str, title: str):
+    """Lowercased keys a record is reachable by: its code, its title, and each word suffix of the title."""
+    title = title.lower()
+    keys = {code.lower(), title}
+    for match in WORD_BOUNDARY.finditer(title):
+        suffix = title[match.end() :]
+        if suffix:
+            keys.add(suffix)
+    return keys
+
+
+class PrefixIndex:
+    """Compact sorted-array prefix index over ONET occupation codes and titles.
+
+    Keys are kept in one sorted list of `(key, code)` tuples, so a lookup is a
+    binary search followed by a short forward scan.
+    """
+
+    def __init__(self):
+        self._entries: list[tuple[str, str]] = []
+        self.titles: dict[str, str] = {}
+
+    def __len__(self):
+        return len(self.titles)
+
+    def build(self, records):
+        """Replace the index contents with `{code, title}` records."""
+        self.titles = {record["code"]: record["title"] for record in records}
+        self._entries = sorted(
+            (key, code)
+            for code, title in self.titles.items()
+            for key in index_keys(code, title)
+        )
+
+    def update(self, records):
+        """Insert new records and re-key any whose title changed."""
+        for record in records:
+            code, title = record["code"], record["title"]
+            if self.titles.get(code) == title:
+                continue
+            self.remove([code])
+            self.titles[code] = title
+            for key in index_keys(code, title):
+                insort(self._entries, (key, code))
+
+    def remove(self, codes):
+        """Drop records from the index by code."""
+        for code in codes:
+            title = self.titles.pop(code, None)
+            if title is None:
+                continue
+            for key in index_keys(code, title):
+                i = bisect_left(self._entries, (key, code))
+                if i < len(self._entries) and self._entries[i] == (key, code):
+                    del self._entries[i]
+
+    def clear(self):
+        self._entries = []
+        self.titles = {}
+
+    def suggest(self, prefix: str, limit: int = 10):
+        """Return up to `limit` records whose code, title or a title word starts with `prefix`."""
+        prefix = prefix.lower()
+        results = []
+        seen = set()
+        i = bisect_left(self._entries, (prefix,))
+        while i < len(self._entries) and len(results) < limit:
+            key, code = self._entries[i]
+            if not key.startswith(prefix):
+                break
+            if code not in seen:
+                seen.add(code)
+                results.append({"code": code, "title": self.titles[code]})
+            i += 1
+        return results
+
+    async def load(self):
+        """Build the index from every stored occupation."""
+        occupations = await prisma.onetoccupation.find_many()
+        self.build([{"code": o.code, "title": o.title} for o in occupations])
+
+    async def refresh_since(self, since: datetime):
+        """Incrementally apply occupations created or retitled since `since`."""
+        occupations = await prisma.onetoccupation.find_many(
+            where={"updatedAt": {"gte": since}}
+        )
+        self.update([{"code": o.code, "title": o.title} for o in occupations])
+
+
+# Create a singleton occupation index, built at startup and refreshed after imports
+occupation_index = PrefixIndex()
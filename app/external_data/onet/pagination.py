@@ -0,0 +1,141 @@
+import os
+import asyncio
+import httpx
+from fastapi import HTTPException
+from app.external_data.onet.client import onet_client
+from app.external_data.onet.parser import OnetRecordParser
+
+# Number of records requested per ONET page (ONET defaults to 20 when unset)
+ONET_PAGE_SIZE = int(os.getenv("ONET_PAGE_SIZE", "200"))
+
+# Times a page is fetched again when its body is cut off part way, overridable
+# through the environment
+ONET_PAGE_RETRIES = int(os.getenv("ONET_PAGE_RETRIES", "2"))
+
+# Listing path, record element and whether ONET paginates it, for each record kind
+ONET_SOURCES = {
+    "occupation": ("/occupations", "occupation", True),
+    "industry": ("/industries", "industry", False),
+}
+
+
+def page_windows(total: int, page_size: int, start: int = 1):
+    """Compute every inclusive (start, end) window needed to cover `total` records."""
+    return [
+        (first, min(first + page_size - 1, total))
+        for first in range(start, total + 1, page_size)
+    ]
+
+
+def check_content_type(response):
+    """Reject ONET responses that are not XML."""
+    if "xml" not in response.headers.get("Content-Type", "").lower():
+        raise HTTPException(
+            status_code=500,
+            detail="Invalid response format from O*NET (expected XML)",
+        )
+
+
+async def stream_window(
+    path: str,
+    element: str,
+    start: int | None = None,
+    end: int | None = None,
+    parser: OnetRecordParser | None = None,
+):
+    """Yield `{code, title}` records from one ONET response as its chunks arrive."""
+    parser = parser or OnetRecordParser(element)
+    params = {"start": start, "end": end} if start is not None else None
+
+    async with onet_client.stream(path, params=params) as response:
+        check_content_type(response)
+
+        async for chunk in response.aiter_bytes():
+            for record in parser.feed(chunk):
+                yield record
+        for record in parser.close():
+            yield record
+
+
+async def retry_page(fetch, *args, **kwargs):
+    """Run a whole-page fetch, fetching the page again if its connection drops.
+
+    The client retries failures before a response begins; this covers bodies
+    cut off part way, so a crawl resumes at the broken page instead of failing.
+    """
+    for attempt in range(ONET_PAGE_RETRIES + 1):
+        try:
+            return await fetch(*args, **kwargs)
+        except httpx.TransportError:
+            if attempt == ONET_PAGE_RETRIES:
+                raise
+
+
+async def fetch_window(
+    path: str, element: str, start: int | None = None, end: int | None = None
+):
+    """Fetch and parse a single page window, fetching it again if it is cut off."""
+
+    async def fetch():
+        return [record async for record in stream_window(path, element, start, end)]
+
+    return await retry_page(fetch)
+
+
+async def iter_page_windows(
+    path: str,
+    element: str,
+    page_size: int = ONET_PAGE_SIZE,
+    start: int = 1,
+    parser: OnetRecordParser | None = None,
+):
+    """Yield `(start, end, records)` for every page window of an ONET listing from `start`.
+
+    The first window is fetched alone to learn the total, then the remaining
+    ones are fetched concurrently and yielded in window order, so a consumer
+    can commit page by page and later resume after the last page it committed.
+    """
+    parser = parser or OnetRecordParser(element)
+    end = start + page_size - 1
+
+    async def fetch_first():
+        parser.reset()
+        return [
+            record async for record in stream_window(path, element, start, end, parser)
+        ]
+
+    records = await retry_page(fetch_first)
+    if parser.total is not None:
+        end = min(end, parser.total)
+    yield start, end, records
+
+    if parser.total is None:
+        # No total reported, so walk the remaining pages one at a time
+        while len(records) == page_size:
+            start, end = end + 1, end + page_size
+            records = await fetch_window(path, element, start, end)
+            yield start, end, records
+        return
+
+    windows = page_windows(parser.total, page_size, start + page_size)
+    tasks = [
+        asyncio.ensure_future(fetch_window(path, element, first, last))
+        for first, last in windows
+    ]
+    try:
+        for (first, last), task in zip(windows, tasks):
+            yield first, last, await task
+    finally:
+        # Stop any windows still in flight if the consumer bailed out early
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def fetch_all_pages(path: str, element: str, page_size: int = ONET_PAGE_SIZE):
+    """Fetch every page of an ONET listing concurrently, in order and deduplicated by code."""
+    records = {}
+    async for _, _, page in iter_page_windows(path, element, page_size):
+        for record in page:
+            records.setdefault(record["code"], record)
+    return list(records.values())
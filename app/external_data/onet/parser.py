@@ -0,0 +1,55 @@
+import xml.etree.ElementTree as ET
+
+
+class OnetRecordParser:
+    """Incrementally parse ONET XML into `{code, title}` records as chunks arrive.
+
+    Completed record elements are detached from their parent once read, so only
+    the element currently being parsed is held in memory.
+    """
+
+    def __init__(self, element: str):
+        self.element = element
+        self.total: int | None = None
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack: list[ET.Element] = []
+
+    def reset(self):
+        """Start over on a new copy of the document, keeping any total already seen."""
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack = []
+
+    def feed(self, chunk: bytes) -> list[dict]:
+        """Feed a chunk of the response body and return the records it completed."""
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> list[dict]:
+        """Finish parsing and return any remaining records."""
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> list[dict]:
+        records = []
+        for event, node in self._parser.read_events():
+            if event == "start":
+                # ONET reports the total as an attribute on the root element
+                if not self._stack and node.get("total"):
+                    self.total = int(node.get("total"))
+                self._stack.append(node)
+                continue
+
+            self._stack.pop()
+
+            # Some responses report the total as a child element of the root instead
+            if node.tag == "total" and len(self._stack) == 1 and node.text:
+                self.total = int(node.text)
+
+            if node.tag == self.element:
+                records.append(
+                    {"code": node.findtext("code"), "title": node.findtext("title")}
+                )
+                # Free the finished record so the tree never grows with the page
+                if self._stack:
+                    self._stack[-1].remove(node)
+        return records
@@ -0,0 +1,324 @@
+"""Bulk-load ONET occupations and industries from a local O*NET database release.
+
+The release may be an extracted directory or the downloaded `.zip` archive of
+the tab-delimited text files. Rows are streamed into Postgres with `COPY` and
+merged set-based, so a full refresh needs no network access and takes seconds.
+
+    python -m app.external_data.onet.release path/to/db_29_0_text.zip --kind occupation
+
+The command line writes straight to the database, outside any running server.
+Servers under gunicorn notice within REFERENCE_SYNC_INTERVAL, since their workers
+watch the ONET tables; a single-process server keeps serving its cached ONET
+reads and occupation index until restarted. POST /v1/onetimports/release loads
+a release through the server itself and refreshes both at once.
+"""
+
+import os
+import io
+import mmap
+import zipfile
+import argparse
+import asyncio
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+from fastapi import HTTPException
+import psycopg2
+from app.external_data.onet.ingest import ONET_TABLES
+
+# Directory release archives are read from, overridable through the environment
+ONET_RELEASE_DIR = os.getenv("ONET_RELEASE_DIR", "onet_release")
+
+# Release file and its code/title column headers, for each record kind
+RELEASE_FILES = {
+    "occupation": (
+        os.getenv("ONET_RELEASE_OCCUPATION_FILE", "Occupation Data.txt"),
+        "O*NET-SOC Code",
+        "Title",
+    ),
+    "industry": (
+        os.getenv("ONET_RELEASE_INDUSTRY_FILE", "Industry Data.txt"),
+        "Industry Code",
+        "Industry Title",
+    ),
+}
+
+
+def resolve_source(source: str) -> str:
+    """Resolve a release name inside ONET_RELEASE_DIR, refusing paths that escape it."""
+    root = os.path.realpath(ONET_RELEASE_DIR)
+    path = os.path.realpath(os.path.join(root, source))
+    if os.path.commonpath([root, path]) != root:
+        raise HTTPException(
+            status_code=400, detail="Release path is outside the release directory"
+        )
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Release {source} not found")
+    return path
+
+
+@contextmanager
+def open_release_file(source: str, filename: str):
+    """Yield an iterator over the raw lines of one file in a release directory or zip.
+
+    Files on disk are memory-mapped so lines are sliced out of the page cache;
+    zip members are decompressed as a stream. Neither is read into memory whole.
+    """
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            # Releases nest their files in a versioned folder, e.g. db_29_0_text/
+            names = [
+                name
+                for name in archive.namelist()
+                if os.path.basename(name) == filename
+            ]
+            if not names:
+                raise FileNotFoundError(f"{filename} not found in {source}")
+            with archive.open(names[0]) as member:
+                yield iter(member.readline, b"")
+        return
+
+    path = os.path.join(source, filename)
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield iter(())
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield iter(mapped.readline, b"")
+
+
+def iter_release_records(lines, code_column: str, title_column: str):
+    """Yield `(code, title)` pairs from tab-delimited lines with a header row."""
+    header = next(lines, b"").decode("utf-8-sig").rstrip("\r\n").split("\t")
+    try:
+        code_index = header.index(code_column)
+        title_index = header.index(title_column)
+    except ValueError:
+        raise ValueError(
+            f"Release file is missing the {code_column!r} or {title_column!r} column"
+        )
+
+    for line in lines:
+        fields = line.rstrip(b"\r\n").split(b"\t")
+        if len(fields) <= max(code_index, title_index):
+            continue
+        yield (
+            fields[code_index].decode("utf-8").strip(),
+            fields[title_index].decode("utf-8").strip(),
+        )
+
+
+def copy_escape(value: str) -> str:
+    """Escape a value for the `COPY ... FROM STDIN` text format."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class CopyStream(io.RawIOBase):
+    """Readable file over `(code, title)` records, encoded for `COPY` as it is read."""
+
+    def __init__(self, records):
+        self._records = iter(records)
+        self._buffer = b""
+        self.rows = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            record = next(self._records, None)
+            if record is None:
+                break
+            self.rows += 1
+            self._buffer += ("\t".join(map(copy_escape, record)) + "\n").encode()
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def dedupe_codes(records):
+    """Drop repeated codes from a record stream, keeping the first occurrence."""
+    seen = set()
+    for code, title in records:
+        if code and code not in seen:
+            seen.add(code)
+            yield code, title
+
+
+# DATABASE_URL query parameters only Prisma understands, which libpq would reject
+PRISMA_ONLY_PARAMS = {
+    "schema",
+    "connection_limit",
+    "pool_timeout",
+    "pgbouncer",
+    "socket_timeout",
+    "statement_cache_size",
+    "sslidentity",
+    "sslpassword",
+    "sslaccept",
+}
+
+
+def database_dsn(url: str | None = None) -> str:
+    """Turn the Prisma DATABASE_URL into a psycopg2 DSN.
+
+    Prisma-only query parameters (pool settings, `schema`) are dropped and libpq
+    ones such as `sslmode` or `options` kept; a `schema` is applied as the
+    connection's search path instead.
+    """
+    parts = urlsplit(url or os.environ["DATABASE_URL"])
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    query = {name: value for name, value in params if name not in PRISMA_ONLY_PARAMS}
+    schema = dict(params).get("schema")
+    if schema:
+        # libpq splits `options` on unescaped spaces
+        identifier = '"{}"'.format(schema.replace('"', '""')).replace(" ", "\\ ")
+        search_path = f"-csearch_path={identifier}"
+        query["options"] = " ".join(filter(None, [query.get("options"), search_path]))
+    return urlunsplit(parts._replace(query=urlencode(query, quote_via=quote)))
+
+
+def retitle_release(cursor, table: str):
+    """Retitle rows from the staged release without breaking the unique title.
+
+    Retitles are staged in a temp table, and those whose new title another
+    code keeps are dropped until none are left; a dropped row keeps its old
+    title, which may block another. Of several codes asking for one title,
+    the lowest code gets it. When titles move between retitled rows, the rows
+    are parked on ID-derived titles first. Returns the rows retitled and the
+    retitles dropped.
+    """
+    cursor.execute(
+        "CREATE TEMP TABLE onet_retitle ON COMMIT DROP AS "
+        "SELECT t.id, t.code, t.title AS old_title, r.title "
+        f'FROM "{table}" AS t JOIN onet_release AS r ON t.code = r.code '
+        "WHERE t.title <> r.title"
+    )
+    wanted = cursor.rowcount
+    cursor.execute(
+        "DELETE FROM onet_retitle AS a USING onet_retitle AS b "
+        "WHERE a.title = b.title AND a.code > b.code"
+    )
+    while True:
+        cursor.execute(
+            "DELETE FROM onet_retitle AS a WHERE EXISTS "
+            f'(SELECT 1 FROM "{table}" AS t WHERE t.title = a.title AND NOT EXISTS '
+            "(SELECT 1 FROM onet_retitle AS x WHERE x.id = t.id))"
+        )
+        if not cursor.rowcount:
+            break
+
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM onet_retitle AS a "
+        "JOIN onet_retitle AS b ON a.title = b.old_title)"
+    )
+    if cursor.fetchone()[0]:
+        cursor.execute(
+            f"UPDATE \"{table}\" AS t SET title = 'parked:' || t.id::text "
+            "FROM onet_retitle AS r WHERE t.id = r.id"
+        )
+    cursor.execute(
+        f'UPDATE "{table}" AS t SET title = r.title, "updatedAt" = now() '
+        "FROM onet_retitle AS r WHERE t.id = r.id"
+    )
+    return cursor.rowcount, wanted - cursor.rowcount
+
+
+def load_release(kind: str, import_id: str, source: str, dsn: str | None = None):
+    """COPY one release file into a staging table and merge it in a single transaction.
+
+    Returns the import counters: rows read, unique codes, and rows created,
+    retitled, left unchanged or skipped. A code is skipped when its row could
+    not be inserted or retitled because another code already holds its title.
+    """
+    filename, code_column, title_column = RELEASE_FILES[kind]
+    table, join_table = ONET_TABLES[kind]
+
+    with open_release_file(source, filename) as lines:
+        records = iter_release_records(lines, code_column, title_column)
+        read = 0
+
+        def counted(records):
+            nonlocal read
+            for record in records:
+                read += 1
+                yield record
+
+        stream = CopyStream(dedupe_codes(counted(records)))
+        connection = psycopg2.connect(dsn or database_dsn())
+        try:
+            with connection, connection.cursor() as cursor:
+                cursor.execute(
+                    "CREATE TEMP TABLE onet_release (code text PRIMARY KEY, title text) "
+                    "ON COMMIT DROP"
+                )
+                cursor.copy_expert(
+                    "COPY onet_release (code, title) FROM STDIN", stream, size=65536
+                )
+
+                updated, conflicts = retitle_release(cursor, table)
+
+                cursor.execute(
+                    f'INSERT INTO "{table}" (id, code, title, "updatedAt") '
+                    "SELECT gen_random_uuid(), code, title, now() FROM onet_release "
+                    "ON CONFLICT DO NOTHING"
+                )
+                created = cursor.rowcount
+
+                # ON CONFLICT DO NOTHING drops conflicting rows silently; count them
+                cursor.execute(
+                    "SELECT count(*) FROM onet_release AS r WHERE NOT EXISTS "
+                    f'(SELECT 1 FROM "{table}" AS t WHERE t.code = r.code)'
+                )
+                skipped = cursor.fetchone()[0] + conflicts
+
+                cursor.execute(
+                    f'INSERT INTO "{join_table}" ("A", "B") '
+                    f'SELECT %s::uuid, t.id FROM "{table}" AS t '
+                    "JOIN onet_release AS r ON r.code = t.code "
+                    "ON CONFLICT DO NOTHING",
+                    (import_id,),
+                )
+        finally:
+            connection.close()
+
+    return {
+        "totalRows": stream.rows,
+        "processedRows": read,
+        "createdRows": created,
+        "updatedRows": updated,
+        "unchangedRows": stream.rows - created - updated - skipped,
+        "skippedRows": skipped,
+    }
+
+
+async def main(args):
+    from app.prisma import connect_prisma, disconnect_prisma
+    from app.external_data.onet.imports.jobs import import_jobs
+
+    await connect_prisma()
+    try:
+        for kind in args.kind:
+            import_record = await import_jobs.create(kind, "release", args.source)
+            await import_jobs.run(import_record.id, kind, "release", args.source)
+            print(f"Loaded {kind} release into import {import_record.id}")
+    finally:
+        await disconnect_prisma()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="Release directory or .zip archive")
+    parser.add_argument(
+        "--kind",
+        nargs="+",
+        choices=list(RELEASE_FILES),
+        default=list(RELEASE_FILES),
+        help="Record kinds to load (default: all)",
+    )
+    asyncio.run(main(parser.parse_args()))
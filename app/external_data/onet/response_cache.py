@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from typing import NamedTuple
+import httpx
+
+# On-disk ONET response cache settings, overridable through the environment
+ONET_CACHE_DIR = os.getenv("ONET_CACHE_DIR", ".onet_cache")
+ONET_CACHE_MODE = os.getenv("ONET_CACHE_MODE", "off")  # off | on | replay
+ONET_CACHE_MAX_AGE = float(os.getenv("ONET_CACHE_MAX_AGE", "86400"))  # seconds
+
+# Response headers kept alongside a cached body
+CACHED_HEADERS = ("content-type", "content-encoding", "etag", "last-modified")
+
+
+class OnetCacheMiss(httpx.HTTPError):
+    """Raised in replay-only mode when a response has not been cached yet."""
+
+
+class CacheEntry(NamedTuple):
+    meta: dict
+    body_path: str
+
+
+class FileByteStream(httpx.AsyncByteStream):
+    """Serve a cached response body from disk in chunks."""
+
+    def __init__(self, path: str, chunk_size: int = 64 * 1024):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    async def __aiter__(self):
+        with open(self.path, "rb") as file:
+            while chunk := file.read(self.chunk_size):
+                yield chunk
+
+
+class TeeByteStream(httpx.AsyncByteStream):
+    """Pass a response body through unchanged while copying it to a file."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, file):
+        self.stream = stream
+        self.file = file
+        self.complete = False
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.file.write(chunk)
+            yield chunk
+        self.complete = True
+
+    async def aclose(self):
+        await self.stream.aclose()
+
+
+class ResponseCache:
+    """Disk cache of raw ONET responses, keyed by URL and query parameters."""
+
+    def __init__(
+        self,
+        directory: str = ONET_CACHE_DIR,
+        mode: str = ONET_CACHE_MODE,
+        max_age: float = ONET_CACHE_MAX_AGE,
+    ):
+        self.directory = directory
+        self.mode = mode
+        self.max_age = max_age
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("on", "replay")
+
+    @property
+    def replay(self) -> bool:
+        """Serve only from disk and never touch the network."""
+        return self.mode == "replay"
+
+    def key(self, url: str, params: dict | None = None) -> str:
+        """Derive a stable cache key from a URL and its query parameters."""
+        query = json.dumps(sorted((params or {}).items()), default=str)
+        return hashlib.sha256(f"{url}?{query}".encode()).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return f"{base}.json", f"{base}.body"
+
+    def lookup(self, key: str) -> CacheEntry | None:
+        """Return the cached entry for a key, if both its metadata and body exist."""
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path) as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(meta, body_path) if os.path.exists(body_path) else None
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.meta["fetched_at"] < self.max_age
+
+    def conditional_headers(self, entry: CacheEntry) -> dict:
+        """Build revalidation headers from a cached entry's validators."""
+        headers = {}
+        if entry.meta["headers"].get("etag"):
+            headers["If-None-Match"] = entry.meta["headers"]["etag"]
+        if entry.meta["headers"].get("last-modified"):
+            headers["If-Modified-Since"] = entry.meta["headers"]["last-modified"]
+        return headers
+
+    def touch(self, key: str, entry: CacheEntry):
+        """Mark a revalidated entry as fresh again."""
+        self._write_meta(key, {**entry.meta, "fetched_at": time.time()})
+
+    def response(self, entry: CacheEntry) -> httpx.Response:
+        """Rebuild a streaming response from a cached entry."""
+        return httpx.Response(
+            200,
+            headers=entry.meta["headers"],
+            stream=FileByteStream(entry.body_path),
+            request=httpx.Request("GET", entry.meta["url"]),
+        )
+
+    @contextmanager
+    def record(self, key: str, response: httpx.Response):
+        """Copy a response body to disk as it is read, committing it once fully consumed."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                tee = TeeByteStream(response.stream, file)
+                response.stream = tee
+                yield response
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        if not tee.complete:
+            os.unlink(temp_path)
+            return
+
+        _, body_path = self._paths(key)
+        os.replace(temp_path, body_path)
+        self._write_meta(
+            key,
+            {
+                "url": str(response.request.url),
+                "headers": {
+                    name: response.headers[name]
+                    for name in CACHED_HEADERS
+                    if name in response.headers
+                },
+                "fetched_at": time.time(),
+            },
+        )
+
+    def _write_meta(self, key: str, meta: dict):
+        meta_path, _ = self._paths(key)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        with os.fdopen(fd, "w") as file:
+            json.dump(meta, file)
+        os.replace(temp_path, meta_path)
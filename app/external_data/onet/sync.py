@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+from typing import NamedTuple
+from app.prisma import prisma
+from app.external_data.onet.client import onet_client
+from app.external_data.onet.parser import OnetRecordParser
+from app.external_data.onet.pagination import (
+    ONET_PAGE_SIZE,
+    ONET_SOURCES,
+    check_content_type,
+    page_windows,
+    retry_page,
+)
+
+
+# Outcome of a conditional page fetch; `records` is None when the page is unchanged
+class PageResult(NamedTuple):
+    start: int
+    end: int
+    records: list[dict] | None
+    codes: list[str]
+    total: int | None
+    etag: str | None
+    last_modified: str | None
+    content_hash: str
+
+
+async def fetch_page(path, element, start, end, known=None, paginated=True):
+    """Conditionally fetch one ONET page, comparing it to the stored OnetPage `known`."""
+    headers = {}
+    if known and known.etag:
+        headers["If-None-Match"] = known.etag
+    if known and known.lastModified:
+        headers["If-Modified-Since"] = known.lastModified
+
+    params = {"start": start, "end": end} if paginated else None
+    async with onet_client.stream(path, params=params, headers=headers) as response:
+        if response.status_code == 304:
+            return PageResult(
+                start,
+                end,
+                None,
+                known.codes,
+                known.total,
+                known.etag,
+                known.lastModified,
+                known.contentHash,
+            )
+
+        check_content_type(response)
+
+        # Hash the raw body while parsing it so unchanged pages can be skipped
+        parser = OnetRecordParser(element)
+        digest = hashlib.sha256()
+        records = []
+        async for chunk in response.aiter_bytes():
+            digest.update(chunk)
+            records.extend(parser.feed(chunk))
+        records.extend(parser.close())
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+    content_hash = digest.hexdigest()
+    unchanged = known is not None and known.contentHash == content_hash
+    return PageResult(
+        start,
+        end,
+        None if unchanged else records,
+        [record["code"] for record in records],
+        parser.total,
+        etag,
+        last_modified,
+        content_hash,
+    )
+
+
+async def crawl_delta(kind: str, page_size: int = ONET_PAGE_SIZE):
+    """Fetch every page of an ONET listing, skipping pages unchanged since the last sync."""
+    path, element, paginated = ONET_SOURCES[kind]
+    known = {
+        (page.start, page.end): page
+        for page in await prisma.onetpage.find_many(where={"kind": kind})
+    }
+
+    if not paginated:
+        return [
+            await retry_page(fetch_page, path, element, 0, 0, known.get((0, 0)), False)
+        ]
+
+    first = await retry_page(
+        fetch_page, path, element, 1, page_size, known.get((1, page_size))
+    )
+    if first.total is None:
+        # No total reported, so walk the remaining pages one at a time
+        pages = [first]
+        while len(pages[-1].codes) == page_size:
+            start = pages[-1].end + 1
+            end = start + page_size - 1
+            pages.append(
+                await retry_page(
+                    fetch_page, path, element, start, end, known.get((start, end))
+                )
+            )
+        return pages
+
+    rest = await asyncio.gather(
+        *(
+            retry_page(fetch_page, path, element, start, end, known.get((start, end)))
+            for start, end in page_windows(first.total, page_size, page_size + 1)
+        )
+    )
+    return [first, *rest]
+
+
+async def forget_pages(kind: str, codes: list[str] | None = None):
+    """Drop stored page states so the next delta sync fetches those pages in full.
+
+    Deleting records leaves their pages' validators and hashes unchanged, so a
+    delta sync would otherwise skip the pages and never restore the records.
+    With `codes`, only the pages listing one of them are dropped.
+    """
+    where = {"kind": kind}
+    if codes is not None:
+        where["codes"] = {"hasSome": codes}
+    return await prisma.onetpage.delete_many(where=where)
+
+
+async def save_page_states(client, kind: str, pages):
+    """Store the validators and content hash of every page that changed."""
+    for page in pages:
+        if page.records is None:
+            continue
+
+        data = {
+            "etag": page.etag,
+            "lastModified": page.last_modified,
+            "contentHash": page.content_hash,
+            "codes": page.codes,
+            "total": page.total,
+        }
+        await client.onetpage.upsert(
+            where={
+                "kind_start_end": {"kind": kind, "start": page.start, "end": page.end}
+            },
+            data={
+                "create": {
+                    "kind": kind,
+                    "start": page.start,
+                    "end": page.end,
+                    **data,
+                },
+                "update": data,
+            },
+        )
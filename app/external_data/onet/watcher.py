@@ -0,0 +1,68 @@
+import os
+import asyncio
+import logging
+from app.conditional import load_versions
+from app.external_data.onet.cache import invalidate_onet_cache
+from app.external_data.onet.occupation.suggest import occupation_index
+
+log = logging.getLogger(__name__)
+
+# Seconds between checks for ONET changes made by sibling worker processes
+REFERENCE_SYNC_INTERVAL = float(os.getenv("REFERENCE_SYNC_INTERVAL", "5"))
+
+# Table behind each ONET record kind
+REFERENCE_TABLES = {"occupation": "OnetOccupation", "industry": "OnetIndustry"}
+
+
+class ReferenceWatcher:
+    """Keep one worker's ONET caches and occupation index in step with its siblings.
+
+    Under a preforking server every worker holds its own ONET read caches and
+    occupation index, and only the worker that ran an import or delete sees it
+    happen. The watcher polls the ONET tables' versions (row count and newest
+    `updatedAt`) and, when one has moved, drops that kind's cache and rebuilds
+    the index.
+    """
+
+    def __init__(self, interval: float = REFERENCE_SYNC_INTERVAL):
+        self.interval = interval
+        self.versions: dict[str, str] = {}
+        self._task: asyncio.Task | None = None
+
+    async def snapshot(self):
+        """Record the table versions the current caches and index were built from."""
+        self.versions = await load_versions(list(REFERENCE_TABLES.values()))
+
+    async def check(self):
+        """Refresh every kind whose table changed since the last check."""
+        versions = await load_versions(list(REFERENCE_TABLES.values()))
+        for kind, table in REFERENCE_TABLES.items():
+            if versions.get(table) == self.versions.get(table):
+                continue
+            invalidate_onet_cache(kind)
+            if kind == "occupation":
+                await occupation_index.load()
+        self.versions = versions
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception:
+                log.exception("Checking ONET tables for changes failed")
+
+
+# Create a singleton watcher, started by workers forked from a preloaded master
+reference_watcher = ReferenceWatcher()
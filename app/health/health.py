@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Response
+from prisma.errors import PrismaError
+from app.prisma import prisma, pool_stats
+from .schema import Readiness
+
+# Initialize the router with a versioned prefix
+router = APIRouter(prefix="/v1/health", tags=["Health", "Version 1"])
+
+
+# Liveness check that never touches the database
+@router.get("/live")
+async def live():
+    """Report that the process is up."""
+    return {"status": "ok"}
+
+
+# Readiness check with database reachability and pool saturation
+@router.get("/ready", response_model=Readiness)
+async def ready(response: Response):
+    """Ping the database and report connection pool gauges, answering 503 when not ready."""
+    try:
+        await prisma.query_raw("SELECT 1 AS ok")
+        database = True
+    except PrismaError:
+        database = False
+
+    pool = await pool_stats() if prisma.is_connected() else None
+    if pool is None:
+        pool = {"limit": 0, "open": 0, "busy": 0, "idle": 0, "waiting": 0}
+        pool["saturation"] = 0.0
+
+    # A pool with queries queued behind fully busy connections cannot take more work
+    saturated = pool["saturation"] >= 1 and pool["waiting"] > 0
+    if not database or saturated:
+        response.status_code = 503
+    return {"ready": database and not saturated, "database": database, "pool": pool}
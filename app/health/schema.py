@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+
+# Schema for the database connection pool gauges
+class PoolStats(BaseModel):
+    limit: int
+    open: float
+    busy: float
+    idle: float
+    waiting: float
+    saturation: float
+
+
+# Schema for the readiness check
+class Readiness(BaseModel):
+    ready: bool
+    database: bool
+    pool: PoolStats
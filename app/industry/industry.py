@@ -1,28 +1,45 @@
-from fastapi import APIRouter, HTTPException
-from app.prisma import prisma, connect_prisma, disconnect_prisma
-from .schema import IndustryCreate, IndustryUpdate, IndustryModel
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.prisma import prisma
+from app.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    Page,
+    name_filter,
+    paginate,
+)
+from app.export import export_response
+from app.serialization import RowEncoder, json_response
+from app.projection import find_unique
+from app.batch import BatchDelete, BatchResult, batch_create, batch_delete, batch_update
+from .schema import IndustryCreate, IndustryUpdate, IndustryModel, IndustryBatchUpdate
 
 # Initialize the router with a versioned prefix
 router = APIRouter(prefix="/v1/industries", tags=["Industries", "Version 1"])
 
+# Encoder for industry rows returned by the read endpoints
+industry_encoder = RowEncoder(IndustryModel)
 
-# Prisma connection and disconnection lifecycle events
-@router.on_event("startup")
-async def startup():
-    await connect_prisma()
 
+# Get a page of industries
+@router.get("/", response_model=Page[IndustryModel])
+async def get_all_industries(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Fetch a page of industry records, optionally filtered by name and limited to the comma-separated `fields`, ordered by creation time."""
+    encoder = industry_encoder.select(fields)
+    industries = await paginate(prisma.industry, limit, cursor, name_filter(q), encoder)
+    return json_response(encoder.encode_page(industries))
 
-@router.on_event("shutdown")
-async def shutdown():
-    await disconnect_prisma()
 
-
-# Get all industries
-@router.get("/", response_model=list[IndustryModel])
-async def get_all_industries():
-    """Fetch all industry records."""
-    industries = await prisma.industry.find_many()
-    return industries
+# Export all industries as NDJSON or CSV
+@router.get("/export")
+async def export_industries(format: Literal["ndjson", "csv"] = "ndjson"):
+    """Stream every industry record as NDJSON or CSV using chunked database reads."""
+    return export_response(prisma.industry, IndustryModel, format, "industries")
 
 
 # Create a new industry
@@ -33,14 +50,36 @@ async def create_industry(industry_data: IndustryCreate):
     return industry
 
 
+# Create industries in bulk
+@router.post("/batch", response_model=BatchResult)
+async def create_industries_batch(industries_data: list[IndustryCreate]):
+    """Create many industry records at once, reporting each item's result including name conflicts."""
+    return await batch_create("industry", industries_data)
+
+
+# Update industries in bulk
+@router.patch("/batch", response_model=BatchResult)
+async def update_industries_batch(industries_data: list[IndustryBatchUpdate]):
+    """Partially update many industry records at once, reporting each item's result."""
+    return await batch_update("industry", industries_data)
+
+
+# Delete industries in bulk
+@router.delete("/batch", response_model=BatchResult)
+async def delete_industries_batch(batch: BatchDelete):
+    """Delete many industry records by ID at once, reporting IDs that were not found."""
+    return await batch_delete("industry", batch.ids)
+
+
 # Get a specific industry by ID
 @router.get("/{industry_id}", response_model=IndustryModel)
-async def get_industry(industry_id: str):
-    """Fetch an industry by its ID."""
-    industry = await prisma.industry.find_unique(where={"id": industry_id})
+async def get_industry(industry_id: str, fields: Optional[str] = None):
+    """Fetch an industry by its ID, optionally limited to the comma-separated `fields`."""
+    encoder = industry_encoder.select(fields)
+    industry = await find_unique(prisma.industry, encoder, {"id": industry_id})
     if not industry:
         raise HTTPException(status_code=404, detail="Industry not found")
-    return industry
+    return json_response(encoder.encode_row(industry))
 
 
 # Update an industry by ID
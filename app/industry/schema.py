@@ -29,3 +29,8 @@ class IndustryModel(IndustryCreate):
 
     class Config:
         from_attributes = True
+
+
+# Schema for updating an existing Industry as part of a batch, identified by its ID
+class IndustryBatchUpdate(IndustryUpdate):
+    id: str
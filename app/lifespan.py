@@ -0,0 +1,56 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from app.prisma import connect_prisma, disconnect_prisma, warm_up_pool
+from app.metrics.multiprocess import snapshot_writer
+from app.external_data.onet.client import onet_client
+from app.external_data.onet.imports.jobs import import_jobs
+from app.external_data.onet.imports.retention import import_pruner
+from app.external_data.onet.occupation.suggest import occupation_index
+from app.external_data.onet.watcher import reference_watcher
+
+# Set in a preforking server's master once shared state is built, so forked
+# workers know they inherited it
+preloaded = False
+
+
+async def preload():
+    """Build shared state once in a preforking server's master, before workers fork.
+
+    Workers inherit the occupation index copy-on-write instead of each loading
+    their own, and interrupted imports are recovered once rather than by every
+    worker as it starts. The engine is started once to fail fast on a bad
+    database URL, then stopped: its connections cannot be shared across a fork.
+    """
+    global preloaded
+    await connect_prisma()
+    try:
+        await import_jobs.recover()
+        await occupation_index.load()
+        await reference_watcher.snapshot()
+    finally:
+        await disconnect_prisma()
+    preloaded = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources once at startup and release them in reverse on shutdown."""
+    await connect_prisma()
+    await warm_up_pool()
+    if preloaded:
+        # Sibling workers change ONET data too; follow their changes
+        reference_watcher.start()
+    else:
+        await occupation_index.load()
+    await import_jobs.start(recover=not preloaded)
+    import_pruner.start()
+    snapshot_writer.start()
+    try:
+        yield
+    finally:
+        await import_pruner.stop()
+        await import_jobs.stop()
+        await reference_watcher.stop()
+        await snapshot_writer.stop()
+        await onet_client.aclose()
+        await disconnect_prisma()
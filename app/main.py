@@ -1,10 +1,17 @@
 from fastapi import FastAPI
+from app.lifespan import lifespan
+from app.compression import CompressionMiddleware
+from app.conditional import ConditionalGetMiddleware
+from app.metrics.middleware import MetricsMiddleware
 
 # Import app routers
 from app.career.career import router as career_router
 from app.industry.industry import router as industry_router
 from app.credential.credential import router as credential_router
 from app.skill.skill import router as skill_router
+from app.search.search import router as search_router
+from app.health.health import router as health_router
+from app.metrics.metrics import router as metrics_router
 
 # Import ONET routers
 from app.external_data.onet.imports.imports import router as imports_router
@@ -13,13 +20,25 @@ from app.external_data.onet.occupation.occupation import (
     router as onet_occupation_router,
 )
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Answer conditional GETs from table versions before endpoints run
+app.add_middleware(ConditionalGetMiddleware)
+
+# Compress large responses with the best encoding the client accepts
+app.add_middleware(CompressionMiddleware)
+
+# Record request latency and database usage per route (outermost, so 304s are timed too)
+app.add_middleware(MetricsMiddleware)
 
 # Include app routers
 app.include_router(career_router)
 app.include_router(industry_router)
 app.include_router(credential_router)
 app.include_router(skill_router)
+app.include_router(search_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
 
 # Include ONET routers
 app.include_router(imports_router)
@@ -0,0 +1,33 @@
+import asyncio
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from prisma.errors import PrismaError
+from app.prisma import prisma
+from .registry import registry
+from .multiprocess import METRICS_DIR, collect
+
+# Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Initialize the router at the conventional unversioned scrape path
+router = APIRouter(tags=["Metrics"])
+
+
+# Prometheus scrape endpoint
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Render app metrics followed by the Prisma engine's own pool and query metrics.
+
+    Under the multi-process server, app metrics are totals across all workers;
+    engine metrics describe the pool of the worker that answered the scrape.
+    """
+    if METRICS_DIR:
+        body = registry.render(await asyncio.to_thread(collect))
+    else:
+        body = registry.render()
+    if prisma.is_connected():
+        try:
+            body += await prisma.get_metrics(format="prometheus")
+        except PrismaError:
+            pass
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,54 @@
+import time
+from .registry import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUEST_QUERIES,
+    HTTP_REQUEST_QUERY_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    QueryStats,
+    current_queries,
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and database usage per route.
+
+    Requests are labelled by their route template (e.g. `/v1/careers/{career_id}`)
+    rather than the raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        queries = QueryStats()
+        token = current_queries.set(queries)
+        HTTP_REQUESTS_IN_FLIGHT.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec(method)
+            current_queries.reset(token)
+
+            # The router stores the matched route in the scope it was handed
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            HTTP_REQUESTS.inc(method, route, status)
+            HTTP_REQUEST_DURATION.observe(duration, method, route)
+            HTTP_REQUEST_QUERIES.observe(queries.count, method, route)
+            HTTP_REQUEST_QUERY_DURATION.observe(queries.duration, method, route)
@@ -0,0 +1,113 @@
+"""Combine the metrics of the worker processes of a preforking server.
+
+Each worker periodically writes a snapshot of its registry to METRICS_DIR, and
+whichever worker is scraped merges every snapshot into one exposition, so
+Prometheus sees totals for the whole server rather than for one random worker.
+When a worker exits, the master folds its last snapshot into an archive, so
+counters survive worker restarts while its live gauges are dropped.
+"""
+
+import os
+import glob
+import json
+import asyncio
+import logging
+from .registry import registry
+
+log = logging.getLogger(__name__)
+
+# Directory shared by the workers' snapshots, set by the production server config;
+# unset means a single process whose registry is rendered directly
+METRICS_DIR = os.getenv("METRICS_DIR")
+
+# Seconds between snapshots of a worker's registry, overridable through the environment
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+# Snapshot holding the combined totals of workers that have exited
+ARCHIVE_FILE = "archive.json"
+
+
+def snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_DIR, f"worker-{pid}.json")
+
+
+def write_json(path: str, data):
+    """Write a file atomically, so readers never see a partial snapshot."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(data, file)
+    os.replace(temporary, path)
+
+
+def read_json(path: str) -> dict:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def write_snapshot():
+    """Publish this worker's current metrics."""
+    write_json(snapshot_path(os.getpid()), registry.snapshot())
+
+
+def collect() -> dict:
+    """Merge the latest snapshot of every worker, this one's included, and the archive."""
+    write_snapshot()
+    paths = sorted(glob.glob(os.path.join(METRICS_DIR, "*.json")))
+    return registry.merge([read_json(path) for path in paths])
+
+
+def archive_worker(pid: int):
+    """Fold an exited worker's last snapshot into the archive. Runs in the master."""
+    path = snapshot_path(pid)
+    final = read_json(path)
+    if final:
+        archive_path = os.path.join(METRICS_DIR, ARCHIVE_FILE)
+        archive = registry.merge([read_json(archive_path), registry.retire(final)])
+        write_json(archive_path, archive)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def reset():
+    """Drop snapshots left by a previous server run, so counters start from zero."""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json*")):
+        os.remove(path)
+
+
+class SnapshotWriter:
+    """Background task publishing this worker's metrics every few seconds."""
+
+    def __init__(self, interval: float = METRICS_FLUSH_INTERVAL):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if METRICS_DIR and self._task is None:
+            self._task = asyncio.create_task(self._write())
+
+    async def stop(self):
+        """Stop writing, leaving a final snapshot for the master to archive."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        write_snapshot()
+
+    async def _write(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                write_snapshot()
+            except OSError:
+                log.exception("Writing the metrics snapshot failed")
+
+
+# Create a singleton writer, started by each worker's lifespan
+snapshot_writer = SnapshotWriter()
@@ -0,0 +1,356 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Latency buckets in seconds, from sub-millisecond queries to slow imports
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Buckets for small counts, such as queries issued by one request
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """A named metric with a fixed set of label names, keyed by label value tuples.
+
+    Each process runs on a single event loop, so updates need no locking.
+    Processes of a preforking server are combined through `snapshot` and
+    `merge` (see `app.metrics.multiprocess`).
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict = {}
+
+    def clear(self):
+        self._values.clear()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self, values=None):
+        for labels, value in (self._values if values is None else values).items():
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+
+    def render(self, snapshot=None):
+        """Render this process's series, or those of a (merged) snapshot."""
+        values = None
+        if snapshot is not None:
+            values = {tuple(entry[0]): entry[1] for entry in snapshot}
+        return "\n".join([*self.header(), *self.samples(values)])
+
+    def snapshot(self) -> list:
+        """JSON-compatible `[labels, value]` entries, for merging across processes."""
+        return [[list(labels), value] for labels, value in self._values.items()]
+
+    def combine(self, entry: list, other: list) -> list:
+        return [entry[0], entry[1] + other[1]]
+
+    def merge(self, snapshots) -> list:
+        """Combine the snapshots of several processes into one, series by series."""
+        merged = {}
+        for snapshot in snapshots:
+            for entry in snapshot:
+                labels = tuple(entry[0])
+                current = merged.get(labels)
+                merged[labels] = (
+                    entry if current is None else self.combine(current, entry)
+                )
+        return list(merged.values())
+
+    def retire(self, snapshot: list) -> list:
+        """The part of an exited process's snapshot that still counts towards totals."""
+        return snapshot
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Gauge whose per-process values are summed across processes, or with
+    `aggregate="latest"` reported from whichever process set them last."""
+
+    kind = "gauge"
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple = (), aggregate: str = "sum"
+    ):
+        super().__init__(name, help, labelnames)
+        self.aggregate = aggregate
+        self._updated: dict = {}
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+        self._updated[labels] = time.time()
+
+    def inc(self, *labels, amount: float = 1):
+        self.set(self._values.get(labels, 0) + amount, *labels)
+
+    def dec(self, *labels, amount: float = 1):
+        self.set(self._values.get(labels, 0) - amount, *labels)
+
+    def snapshot(self) -> list:
+        return [
+            [list(labels), value, self._updated[labels]]
+            for labels, value in self._values.items()
+        ]
+
+    def combine(self, entry: list, other: list) -> list:
+        if self.aggregate == "latest":
+            return max(entry, other, key=lambda item: item[2])
+        return [entry[0], entry[1] + other[1], max(entry[2], other[2])]
+
+    def retire(self, snapshot: list) -> list:
+        # A summed gauge describes live state, which ends with the process
+        return snapshot if self.aggregate == "latest" else []
+
+
+class Histogram(Metric):
+    """Histogram keeping per-bucket counts, made cumulative only when rendered."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple = (), buckets=DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        series = self._values.get(labels)
+        if series is None:
+            # One slot per bucket plus +Inf, then the running sum
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def combine(self, entry: list, other: list) -> list:
+        return [entry[0], [a + b for a, b in zip(entry[1], other[1])]]
+
+    def samples(self, values=None):
+        for labels, series in (self._values if values is None else values).items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                le = f'le="{bound if bound == "+Inf" else format_value(bound)}"'
+                yield f"{self.name}_bucket{format_labels(self.labelnames, labels, le)} {cumulative}"
+            label_text = format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {format_value(series[-1])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, snapshot: dict | None = None) -> str:
+        """Render this process's metrics, or a snapshot such as one from `merge`."""
+        if snapshot is None:
+            return "\n".join(metric.render() for metric in self.metrics) + "\n"
+        return (
+            "\n".join(
+                metric.render(snapshot.get(metric.name, [])) for metric in self.metrics
+            )
+            + "\n"
+        )
+
+    def snapshot(self) -> dict:
+        """JSON-compatible values of every metric in this process."""
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def merge(self, snapshots) -> dict:
+        """Combine the snapshots of several processes into one."""
+        return {
+            metric.name: metric.merge(
+                [snapshot.get(metric.name, []) for snapshot in snapshots]
+            )
+            for metric in self.metrics
+        }
+
+    def retire(self, snapshot: dict) -> dict:
+        """Keep the part of an exited process's snapshot that still counts."""
+        return {
+            metric.name: metric.retire(snapshot.get(metric.name, []))
+            for metric in self.metrics
+        }
+
+
+# Create a singleton registry shared by the whole app
+registry = Registry()
+
+# HTTP request metrics
+HTTP_REQUESTS = registry.register(
+    Counter(
+        "http_requests_total",
+        "HTTP requests by route and status.",
+        ("method", "route", "status"),
+    )
+)
+HTTP_REQUEST_DURATION = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route, including streamed bodies.",
+        ("method", "route"),
+    )
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.register(
+    Gauge(
+        "http_requests_in_flight",
+        "HTTP requests currently being served.",
+        ("method",),
+    )
+)
+HTTP_REQUEST_QUERIES = registry.register(
+    Histogram(
+        "http_request_db_queries",
+        "Database queries issued while serving one request.",
+        ("method", "route"),
+        COUNT_BUCKETS,
+    )
+)
+HTTP_REQUEST_QUERY_DURATION = registry.register(
+    Histogram(
+        "http_request_db_duration_seconds",
+        "Time spent in database queries while serving one request.",
+        ("method", "route"),
+    )
+)
+
+# Database query metrics
+DB_QUERY_DURATION = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Prisma query latency by model and action.",
+        ("model", "method"),
+    )
+)
+DB_QUERY_ERRORS = registry.register(
+    Counter(
+        "db_query_errors_total",
+        "Prisma queries that raised, by model and action.",
+        ("model", "method"),
+    )
+)
+
+# ONET upstream metrics
+ONET_REQUEST_DURATION = registry.register(
+    Histogram(
+        "onet_request_duration_seconds",
+        "ONET web service call latency, including reading the body.",
+        ("status",),
+    )
+)
+ONET_REQUEST_RETRIES = registry.register(
+    Counter(
+        "onet_request_retries_total",
+        "ONET calls retried, by the status of the failed attempt.",
+        ("status",),
+    )
+)
+ONET_CIRCUIT_OPEN = registry.register(
+    Gauge(
+        "onet_circuit_open",
+        "Whether the ONET circuit breaker is failing calls fast (per process, summed).",
+    )
+)
+ONET_CACHE_RESPONSES = registry.register(
+    Counter(
+        "onet_cache_responses_total",
+        "ONET responses served from the disk cache.",
+        ("result",),
+    )
+)
+
+# ONET import metrics
+ONET_IMPORT_ROWS = registry.register(
+    Counter(
+        "onet_import_rows_total",
+        "Rows processed by ONET imports.",
+        ("kind",),
+    )
+)
+ONET_IMPORT_DURATION = registry.register(
+    Histogram(
+        "onet_import_duration_seconds",
+        "ONET import duration by outcome.",
+        ("kind", "mode", "status"),
+        (1, 5, 10, 30, 60, 120, 300, 600, 1800),
+    )
+)
+ONET_IMPORT_THROUGHPUT = registry.register(
+    Gauge(
+        "onet_import_rows_per_second",
+        "Throughput of the most recent completed ONET import.",
+        ("kind",),
+        aggregate="latest",
+    )
+)
+
+
+class QueryStats:
+    """Running count and duration of the queries issued by one request."""
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# Query stats for the request being served, if any
+current_queries: ContextVar[QueryStats | None] = ContextVar(
+    "current_queries", default=None
+)
+
+
+def record_query(model: str, method: str, duration: float, failed: bool = False):
+    """Record one Prisma query globally and against the current request."""
+    DB_QUERY_DURATION.observe(duration, model, method)
+    if failed:
+        DB_QUERY_ERRORS.inc(model, method)
+    stats = current_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += duration
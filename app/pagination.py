@@ -0,0 +1,95 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Generic, Optional, TypeVar
+from fastapi import HTTPException
+from pydantic import BaseModel
+from app.projection import select_many
+
+# Page size limits shared by every list endpoint
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+# Keyset ordering used by every paginated query
+KEYSET_ORDER = [{"createdAt": "asc"}, {"id": "asc"}]
+
+T = TypeVar("T")
+
+
+# Schema for a page of results along with the cursor for the next page
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
+
+
+def name_filter(q: Optional[str]):
+    """Case-insensitive substring filter on `name`, served by its trigram index."""
+    return {"name": {"contains": q, "mode": "insensitive"}} if q else None
+
+
+def title_filter(q: Optional[str]):
+    """Case-insensitive substring filter on `title`, or a prefix match on `code`."""
+    if not q:
+        return None
+    return {
+        "OR": [
+            {"title": {"contains": q, "mode": "insensitive"}},
+            {"code": {"startswith": q}},
+        ]
+    }
+
+
+def encode_cursor(row) -> str:
+    """Encode a row's (createdAt, id) position as an opaque cursor."""
+    payload = json.dumps([row.createdAt.isoformat(), row.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Decode a cursor back into its (createdAt, id) position."""
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), row_id
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_where(cursor: Optional[str], where: Optional[dict] = None):
+    """Combine a filter with the keyset condition for rows after `cursor`."""
+    conditions = [where] if where else []
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        conditions.append(
+            {
+                "OR": [
+                    {"createdAt": {"gt": created_at}},
+                    {"createdAt": created_at, "id": {"gt": row_id}},
+                ]
+            }
+        )
+    return {"AND": conditions} if conditions else None
+
+
+async def paginate(
+    delegate,
+    limit: int,
+    cursor: Optional[str] = None,
+    where: Optional[dict] = None,
+    encoder=None,
+):
+    """Fetch one keyset page of rows ordered by (createdAt, id).
+
+    With a projected `RowEncoder`, only its selected columns are read.
+    """
+    arguments = {
+        "take": limit + 1,
+        "where": keyset_where(cursor, where),
+        "order": KEYSET_ORDER,
+    }
+    if encoder is not None and encoder.selection:
+        rows = await select_many(delegate, encoder, **arguments)
+    else:
+        rows = await delegate.find_many(**arguments)
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
@@ -1,7 +1,77 @@
+import os
+import time
+import asyncio
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from prisma import Prisma
+from app.metrics.registry import record_query
+
+# Connection pool tuning, overridable through the environment
+PRISMA_CONNECTION_LIMIT = int(os.getenv("PRISMA_CONNECTION_LIMIT", "10"))
+PRISMA_POOL_TIMEOUT = int(os.getenv("PRISMA_POOL_TIMEOUT", "10"))  # seconds
+PRISMA_CONNECT_TIMEOUT = int(os.getenv("PRISMA_CONNECT_TIMEOUT", "10"))  # seconds
+# Connections opened ahead of traffic at startup, the whole pool unless set
+PRISMA_WARM_CONNECTIONS = os.getenv("PRISMA_WARM_CONNECTIONS")
+
+
+def pool_url(url: str) -> str:
+    """Add the pool size and pool timeout to a database URL, keeping explicit values."""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.setdefault("connection_limit", str(PRISMA_CONNECTION_LIMIT))
+    query.setdefault("pool_timeout", str(PRISMA_POOL_TIMEOUT))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def connection_limit(url: str | None) -> int:
+    """Pool size the engine uses for a database URL, where an explicit `connection_limit` wins."""
+    if not url:
+        return PRISMA_CONNECTION_LIMIT
+    return int(dict(parse_qsl(urlsplit(pool_url(url)).query))["connection_limit"])
+
+
+class InstrumentedPrisma(Prisma):
+    """Prisma client that times every query it sends to the engine.
+
+    Transactions copy the client through its class, so they are timed too;
+    `batch_()` commits go straight to the engine and are not.
+    """
+
+    async def _execute(self, *, method, arguments, model=None, root_selection=None):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = await super()._execute(
+                method=method,
+                arguments=arguments,
+                model=model,
+                root_selection=root_selection,
+            )
+            failed = False
+            return result
+        finally:
+            record_query(
+                model.__name__ if model is not None else "raw",
+                method,
+                time.perf_counter() - start,
+                failed,
+            )
+
+
+def create_client() -> Prisma:
+    """Build a Prisma client with the configured pool settings."""
+    url = os.getenv("DATABASE_URL")
+    return InstrumentedPrisma(
+        datasource={"url": pool_url(url)} if url else None,
+        connect_timeout=timedelta(seconds=PRISMA_CONNECT_TIMEOUT),
+    )
+
 
 # Create a singleton Prisma client
-prisma = Prisma()
+prisma = create_client()
+
+# Pool size the singleton client's engine runs with
+POOL_LIMIT = connection_limit(os.getenv("DATABASE_URL"))
 
 
 async def connect_prisma():
@@ -14,3 +84,31 @@ async def disconnect_prisma():
     """Disconnect from the Prisma database."""
     if prisma.is_connected():
         await prisma.disconnect()
+
+
+async def warm_up_pool(connections: int | None = None):
+    """Open pool connections ahead of traffic by holding that many queries at once."""
+    if connections is None:
+        connections = int(PRISMA_WARM_CONNECTIONS or POOL_LIMIT)
+    connections = min(connections, POOL_LIMIT)
+    await asyncio.gather(
+        *(
+            prisma.query_raw("SELECT 1 AS ok FROM pg_sleep(0.05)")
+            for _ in range(connections)
+        )
+    )
+
+
+async def pool_stats() -> dict:
+    """Report pool gauges from the query engine's metrics."""
+    metrics = await prisma.get_metrics()
+    gauges = {gauge.key: gauge.value for gauge in metrics.gauges}
+    busy = gauges.get("prisma_pool_connections_busy", 0)
+    return {
+        "limit": POOL_LIMIT,
+        "open": gauges.get("prisma_pool_connections_open", 0),
+        "busy": busy,
+        "idle": gauges.get("prisma_pool_connections_idle", 0),
+        "waiting": gauges.get("prisma_client_queries_wait", 0),
+        "saturation": busy / POOL_LIMIT,
+    }
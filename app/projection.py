@@ -0,0 +1,38 @@
+from app.serialization import RowEncoder
+
+
+# Prisma Client Python has no `select` argument on its query methods, so projected
+# reads go through the client's query executor with an explicit root selection.
+async def select_many(delegate, encoder: RowEncoder, **arguments):
+    """Run `find_many` reading only the encoder's selected columns."""
+    response = await delegate._client._execute(
+        method="find_many",
+        model=delegate._model,
+        arguments={
+            "take": arguments.get("take"),
+            "skip": arguments.get("skip"),
+            "where": arguments.get("where"),
+            "order_by": arguments.get("order"),
+        },
+        root_selection=list(encoder.selection),
+    )
+    return [encoder.parse(result) for result in response["data"]["result"]]
+
+
+async def select_unique(delegate, encoder: RowEncoder, where: dict):
+    """Run `find_unique` reading only the encoder's selected columns."""
+    response = await delegate._client._execute(
+        method="find_unique",
+        model=delegate._model,
+        arguments={"where": where},
+        root_selection=list(encoder.selection),
+    )
+    result = response["data"]["result"]
+    return encoder.parse(result) if result is not None else None
+
+
+async def find_unique(delegate, encoder: RowEncoder, where: dict):
+    """Fetch one row, pushing the encoder's field selection down when it has one."""
+    if encoder.selection:
+        return await select_unique(delegate, encoder, where)
+    return await delegate.find_unique(where=where)
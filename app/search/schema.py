@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+# Schema for a single ranked search match
+class SearchHit(BaseModel):
+    type: str
+    id: str
+    title: str
+    score: float
+
+
+# Schema for a page of ranked search matches
+class SearchResults(BaseModel):
+    items: list[SearchHit]
+    next_offset: Optional[int] = None
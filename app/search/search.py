@@ -0,0 +1,79 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, Query
+from app.prisma import prisma
+from .schema import SearchResults
+
+# Initialize the router with a versioned prefix
+router = APIRouter(prefix="/v1/search", tags=["Search", "Version 1"])
+
+# Searchable tables and the text column each is matched on (backed by pg_trgm GIN indexes)
+SEARCH_TARGETS = {
+    "career": ("Career", "name"),
+    "skill": ("Skill", "name"),
+    "credential": ("Credential", "name"),
+    "industry": ("Industry", "name"),
+    "onet_occupation": ("OnetOccupation", "title"),
+    "onet_industry": ("OnetIndustry", "title"),
+}
+
+SearchType = Literal[
+    "career", "skill", "credential", "industry", "onet_occupation", "onet_industry"
+]
+
+MAX_SEARCH_LIMIT = 100
+
+# pg_trgm indexes only help patterns of at least one full trigram
+MIN_QUERY_LENGTH = 3
+
+
+def like_pattern(q: str) -> str:
+    """Build an ILIKE substring pattern, escaping the user's wildcards."""
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def target_query(type_name: str, table: str, column: str) -> str:
+    """SQL selecting ranked matches from one table.
+
+    The WHERE clause (ILIKE substring or trigram similarity) is served by the
+    table's gin_trgm_ops index; ranking takes the better of trigram similarity
+    and full-text rank over the matched rows only. Each table returns at most
+    the rows the requested page could need, so the merge only sorts those.
+    """
+    return (
+        f"(SELECT '{type_name}' AS type, id::text AS id, \"{column}\" AS title, "
+        f'GREATEST(similarity("{column}", $1), '
+        f"ts_rank(to_tsvector('simple', \"{column}\"), plainto_tsquery('simple', $1))) AS score "
+        f'FROM "{table}" '
+        f'WHERE "{column}" ILIKE $2 OR "{column}" % $1 '
+        "ORDER BY score DESC, id LIMIT $3 + $4)"
+    )
+
+
+async def search_records(q: str, types, limit: int, offset: int):
+    """Run a ranked search across the requested tables, one page at a time."""
+    selects = [
+        target_query(type_name, *SEARCH_TARGETS[type_name])
+        for type_name in (types or SEARCH_TARGETS)
+    ]
+    sql = (
+        f"SELECT * FROM ({' UNION ALL '.join(selects)}) AS hits "
+        "ORDER BY score DESC, id LIMIT $3 OFFSET $4"
+    )
+    rows = await prisma.query_raw(sql, q, like_pattern(q), limit + 1, offset)
+    return {
+        "items": rows[:limit],
+        "next_offset": offset + limit if len(rows) > limit else None,
+    }
+
+
+# Search across careers, skills, credentials, industries and ONET reference data
+@router.get("/", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=MIN_QUERY_LENGTH),
+    types: Optional[list[SearchType]] = Query(None),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT),
+    offset: int = Query(0, ge=0),
+):
+    """Fetch ranked substring and fuzzy title matches, optionally limited to some record types."""
+    return await search_records(q, types, limit, offset)
@@ -0,0 +1,105 @@
+from typing import Optional
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+# Fields every projected query reads, so keyset cursors can still be built
+KEYSET_FIELDS = ("createdAt", "id")
+
+
+class RowEncoder:
+    """Encode trusted database rows straight to JSON without re-validating them.
+
+    FastAPI would validate each row against the response model through
+    `from_attributes` and then serialize it again. Rows read back from Prisma
+    already have the model's types, so this copies just the model's fields, in
+    its order, and dumps them through serializers built once from the model's
+    field types, producing the same bytes as the default response path.
+
+    An encoder restricted to some of the model's fields (see `select`) also
+    carries the `selection` to push down to the query and parses the raw
+    engine results it returns.
+    """
+
+    def __init__(self, model: type[BaseModel], fields: Optional[tuple] = None):
+        self.model = model
+        self.fields = fields or tuple(model.model_fields)
+        self.selection = None
+        self._projections: dict[tuple, RowEncoder] = {}
+
+        annotations = {
+            name: model.model_fields[name].annotation for name in self.fields
+        }
+        row_type = TypedDict(f"{model.__name__}Row", annotations)
+        page_type = TypedDict(
+            f"{model.__name__}Page",
+            {"items": list[row_type], "next_cursor": Optional[str]},
+        )
+        self._row = TypeAdapter(row_type)
+        self._page = TypeAdapter(page_type)
+
+        if fields:
+            self.selection = tuple(dict.fromkeys((*self.fields, *KEYSET_FIELDS)))
+            selected_type = TypedDict(
+                f"{model.__name__}Selection",
+                {name: model.model_fields[name].annotation for name in self.selection},
+            )
+            self._selected = TypeAdapter(selected_type)
+
+    def select(self, fields: Optional[str]) -> "RowEncoder":
+        """Return an encoder for a comma-separated subset of fields, or this one if none.
+
+        Unknown field names are rejected with a 400.
+        """
+        if not fields:
+            return self
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(self.fields)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            )
+        selected = tuple(name for name in self.fields if name in requested)
+        if selected == self.fields:
+            return self
+        if selected not in self._projections:
+            self._projections[selected] = RowEncoder(self.model, selected)
+        return self._projections[selected]
+
+    def parse(self, result: dict):
+        """Turn one raw engine result for `selection` into a row object."""
+        return SelectedRow(self._selected.validate_python(result))
+
+    def values(self, row) -> dict:
+        """Pick the model's fields off a row, in the model's field order."""
+        values = row.__dict__
+        return {field: values[field] for field in self.fields}
+
+    def encode_row(self, row) -> bytes:
+        return self._row.dump_json(self.values(row))
+
+    def encode_page(self, page: dict) -> bytes:
+        """Encode a `paginate` result in the shape of `Page[model]`."""
+        return self._page.dump_json(
+            {
+                "items": [self.values(row) for row in page["items"]],
+                "next_cursor": page["next_cursor"],
+            }
+        )
+
+    def jsonable(self, row) -> dict:
+        """JSON-compatible values of a row, as `model_dump(mode="json")` would give."""
+        return self._row.dump_python(self.values(row), mode="json")
+
+
+class SelectedRow:
+    """Attribute access over the parsed fields of a projected query result."""
+
+    def __init__(self, values: dict):
+        self.__dict__.update(values)
+
+
+def json_response(body: bytes) -> Response:
+    """Send pre-encoded JSON bytes, skipping FastAPI's response model handling."""
+    return Response(content=body, media_type="application/json")
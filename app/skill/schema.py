@@ -29,3 +29,8 @@ class SkillModel(SkillCreate):
 
     class Config:
         from_attributes = True
+
+
+# Schema for updating an existing Skill as part of a batch, identified by its ID
+class SkillBatchUpdate(SkillUpdate):
+    id: str
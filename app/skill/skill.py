@@ -1,28 +1,45 @@
-from fastapi import APIRouter, HTTPException
-from app.prisma import prisma, connect_prisma, disconnect_prisma
-from .schema import SkillCreate, SkillUpdate, SkillModel
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.prisma import prisma
+from app.pagination import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    Page,
+    name_filter,
+    paginate,
+)
+from app.export import export_response
+from app.serialization import RowEncoder, json_response
+from app.projection import find_unique
+from app.batch import BatchDelete, BatchResult, batch_create, batch_delete, batch_update
+from .schema import SkillCreate, SkillUpdate, SkillModel, SkillBatchUpdate
 
 # Initialize the router with a versioned prefix
 router = APIRouter(prefix="/v1/skills", tags=["Skills", "Version 1"])
 
+# Encoder for skill rows returned by the read endpoints
+skill_encoder = RowEncoder(SkillModel)
 
-# Prisma connection and disconnection lifecycle events
-@router.on_event("startup")
-async def startup():
-    await connect_prisma()
 
+# Get a page of skills
+@router.get("/", response_model=Page[SkillModel])
+async def get_all_skills(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Fetch a page of skill records, optionally filtered by name and limited to the comma-separated `fields`, ordered by creation time."""
+    encoder = skill_encoder.select(fields)
+    skills = await paginate(prisma.skill, limit, cursor, name_filter(q), encoder)
+    return json_response(encoder.encode_page(skills))
 
-@router.on_event("shutdown")
-async def shutdown():
-    await disconnect_prisma()
 
-
-# Get all skills
-@router.get("/", response_model=list[SkillModel])
-async def get_all_skills():
-    """Fetch all skill records."""
-    skills = await prisma.skill.find_many()
-    return skills
+# Export all skills as NDJSON or CSV
+@router.get("/export")
+async def export_skills(format: Literal["ndjson", "csv"] = "ndjson"):
+    """Stream every skill record as NDJSON or CSV using chunked database reads."""
+    return export_response(prisma.skill, SkillModel, format, "skills")
 
 
 # Create a new skill
@@ -33,14 +50,36 @@ async def create_skill(skill_data: SkillCreate):
     return skill
 
 
+# Create skills in bulk
+@router.post("/batch", response_model=BatchResult)
+async def create_skills_batch(skills_data: list[SkillCreate]):
+    """Create many skill records at once, reporting each item's result including name conflicts."""
+    return await batch_create("skill", skills_data)
+
+
+# Update skills in bulk
+@router.patch("/batch", response_model=BatchResult)
+async def update_skills_batch(skills_data: list[SkillBatchUpdate]):
+    """Partially update many skill records at once, reporting each item's result."""
+    return await batch_update("skill", skills_data)
+
+
+# Delete skills in bulk
+@router.delete("/batch", response_model=BatchResult)
+async def delete_skills_batch(batch: BatchDelete):
+    """Delete many skill records by ID at once, reporting IDs that were not found."""
+    return await batch_delete("skill", batch.ids)
+
+
 # Get a specific skill by ID
 @router.get("/{skill_id}", response_model=SkillModel)
-async def get_skill(skill_id: str):
-    """Fetch a skill by its ID."""
-    skill = await prisma.skill.find_unique(where={"id": skill_id})
+async def get_skill(skill_id: str, fields: Optional[str] = None):
+    """Fetch a skill by its ID, optionally limited to the comma-separated `fields`."""
+    encoder = skill_encoder.select(fields)
+    skill = await find_unique(prisma.skill, encoder, {"id": skill_id})
     if not skill:
         raise HTTPException(status_code=404, detail="Skill not found")
-    return skill
+    return json_response(encoder.encode_row(skill))
 
 
 # Update a skill by ID
@@ -0,0 +1,166 @@
+"""Stand-in ONET web service serving synthetic occupation and industry XML.
+
+Run it on its own with:
+
+    python -m benchmarks.onet_server --port 8100 --occupations 5000
+
+and point the app at it with `ONET_API_BASE_URL=http://127.0.0.1:8100`.
+The dataset size can be changed while it runs with `PUT /_config`, which also
+injects faults for exercising the client's retries and circuit breaker, e.g.
+
+    curl -X PUT localhost:8100/_config -H 'Content-Type: application/json' \
+        -d '{"error_rate": 0.2, "retry_after": 1, "drop_rate": 0.1, "delay": 0.05}'
+"""
+
+import random
+import asyncio
+import argparse
+import hashlib
+from xml.sax.saxutils import escape
+import uvicorn
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+# ONET returns 20 records when a listing is requested without a window
+ONET_DEFAULT_WINDOW = 20
+
+
+# Schema for the size of the synthetic dataset
+class ServerConfig(BaseModel):
+    occupations: int = 1000
+    industries: int = 20
+    # Bumped to retitle every record, so delta imports see changed pages
+    revision: int = 0
+    # Fault injection: share of requests answered 503 (with `Retry-After` seconds
+    # if set), share whose body is cut off half way, and seconds added before
+    # each response; `seed` makes the sequence of faults repeatable
+    error_rate: float = Field(0.0, ge=0, le=1)
+    retry_after: int | None = None
+    drop_rate: float = Field(0.0, ge=0, le=1)
+    delay: float = Field(0.0, ge=0)
+    seed: int | None = None
+
+
+class DroppedConnection(Exception):
+    """Raised inside a streamed body so the server aborts the connection part way."""
+
+
+def occupation_code(i: int) -> str:
+    """Build an ONET-SOC shaped code (e.g. `11-1011.00`) for the i-th record."""
+    return f"{10 + i // 100000 % 90:02d}-{i // 10 % 10000:04d}.{i % 10:d}0"
+
+
+def occupation(i: int, revision: int) -> tuple[str, str]:
+    suffix = f" r{revision}" if revision else ""
+    return occupation_code(i), f"Synthetic Occupation {i}{suffix}"
+
+
+def industry(i: int, revision: int) -> tuple[str, str]:
+    suffix = f" r{revision}" if revision else ""
+    return f"{i + 1:02d}", f"Synthetic Industry {i}{suffix}"
+
+
+def listing_xml(root: str, element: str, records, start: int, end: int, total: int):
+    """Render an ONET listing with the total on its root element."""
+    parts = [
+        f'<?xml version="1.0"?>\n<{root} start="{start}" end="{end}" total="{total}">'
+    ]
+    for code, title in records:
+        parts.append(
+            f"<{element}><code>{escape(code)}</code><title>{escape(title)}</title></{element}>"
+        )
+    parts.append(f"</{root}>")
+    return "".join(parts).encode()
+
+
+def xml_response(request: Request, body: bytes) -> Response:
+    """Answer with XML and a strong ETag, or 304 when the client already has it.
+
+    Injects the configured faults first: a delay, a 503, or a body cut off
+    after its first half.
+    """
+    config = request.app.state.config
+    faults = request.app.state.faults
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    if faults.random() < config.error_rate:
+        headers = {}
+        if config.retry_after is not None:
+            headers["Retry-After"] = str(config.retry_after)
+        return Response(status_code=503, headers=headers)
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if faults.random() < config.drop_rate:
+
+        async def truncated():
+            yield body[: len(body) // 2]
+            raise DroppedConnection("Injected fault: connection dropped mid-body")
+
+        return StreamingResponse(
+            truncated(),
+            media_type="application/xml",
+            headers={"ETag": etag, "Content-Length": str(len(body))},
+        )
+
+    return Response(body, media_type="application/xml", headers={"ETag": etag})
+
+
+def create_app(config: ServerConfig | None = None) -> FastAPI:
+    app = FastAPI()
+    app.state.config = config or ServerConfig()
+    app.state.faults = random.Random(app.state.config.seed)
+
+    # Replace the dataset size and injected faults
+    @app.put("/_config")
+    async def set_config(new_config: ServerConfig):
+        app.state.config = new_config
+        app.state.faults = random.Random(new_config.seed)
+        return new_config
+
+    # Delay every listing by the configured amount
+    @app.middleware("http")
+    async def delay_responses(request: Request, call_next):
+        delay = app.state.config.delay
+        if delay and request.url.path != "/_config":
+            await asyncio.sleep(delay)
+        return await call_next(request)
+
+    # Paginated occupation listing
+    @app.get("/occupations")
+    async def occupations(
+        request: Request,
+        start: int = Query(1, ge=1),
+        end: int = Query(None, ge=1),
+    ):
+        config = app.state.config
+        total = config.occupations
+        end = min(end or start + ONET_DEFAULT_WINDOW - 1, total)
+        records = (occupation(i, config.revision) for i in range(start - 1, end))
+        body = listing_xml("occupations", "occupation", records, start, end, total)
+        return xml_response(request, body)
+
+    # Unpaginated industry listing
+    @app.get("/industries")
+    async def industries(request: Request):
+        config = app.state.config
+        total = config.industries
+        records = (industry(i, config.revision) for i in range(total))
+        body = listing_xml("industries", "industry", records, 1, total, total)
+        return xml_response(request, body)
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--occupations", type=int, default=1000)
+    parser.add_argument("--industries", type=int, default=20)
+    args = parser.parse_args()
+
+    config = ServerConfig(occupations=args.occupations, industries=args.industries)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
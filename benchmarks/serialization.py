@@ -0,0 +1,127 @@
+"""Compare FastAPI's response-model serialization with the RowEncoder fast path.
+
+Needs no database: rows are synthetic stand-ins shaped like Prisma's generated
+models. Both paths are checked to produce identical bytes before timing.
+
+    python -m benchmarks.serialization --rows 1000 --repeat 50
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.pagination import Page
+from app.career.schema import CareerModel
+from app.external_data.onet.occupation.schema import OnetOccupationModel
+from app.serialization import RowEncoder
+
+
+# Stand-ins for the Prisma models, including their unselected relation fields
+class CareerRow(BaseModel):
+    id: str
+    name: str
+    description: Optional[str] = None
+    createdAt: datetime
+    updatedAt: datetime
+
+
+class OnetOccupationRow(BaseModel):
+    id: str
+    title: str
+    code: str
+    createdAt: datetime
+    updatedAt: datetime
+    imports: Optional[list] = None
+
+
+def make_rows(model, count: int):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        created = start + timedelta(seconds=i, microseconds=i)
+        if model is CareerRow:
+            values = {
+                "name": f"Career {i}",
+                "description": None if i % 3 else f"Description of career {i} – ü",
+            }
+        else:
+            values = {"title": f"Occupation {i}", "code": f"{i // 100:02d}-{i:04d}.00"}
+        rows.append(
+            model(
+                id=f"00000000-0000-4000-8000-{i:012d}",
+                createdAt=created,
+                updatedAt=created,
+                **values,
+            )
+        )
+    return rows
+
+
+async def fastapi_body(field, page) -> bytes:
+    """Serialize the way FastAPI does for `response_model=Page[Model]`."""
+    content = await serialize_response(
+        field=field, response_content=page, is_coroutine=True
+    )
+    return JSONResponse(content).body
+
+
+def timed(function, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark(name, model, row_model, rows: int, repeat: int):
+    page = {"items": make_rows(row_model, rows), "next_cursor": "cursor"}
+    field = create_model_field(name="response", type_=Page[model], mode="serialization")
+    encoder = RowEncoder(model)
+
+    baseline = asyncio.run(fastapi_body(field, page))
+    if encoder.encode_page(page) != baseline:
+        raise AssertionError(f"{name}: fast path output differs from FastAPI's")
+
+    loop = asyncio.new_event_loop()
+    try:
+        default = timed(
+            lambda: loop.run_until_complete(fastapi_body(field, page)), repeat
+        )
+    finally:
+        loop.close()
+    fast = timed(lambda: encoder.encode_page(page), repeat)
+
+    return {
+        "name": name,
+        "rows": rows,
+        "bytes": len(baseline),
+        "default_us_per_row": default / rows * 1e6,
+        "fast_us_per_row": fast / rows * 1e6,
+        "speedup": default / fast,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    results = [
+        benchmark("careers", CareerModel, CareerRow, args.rows, args.repeat),
+        benchmark(
+            "onetoccupations",
+            OnetOccupationModel,
+            OnetOccupationRow,
+            args.rows,
+            args.repeat,
+        ),
+    ]
+    json.dump(results, sys.stdout, indent=2)
+    print()
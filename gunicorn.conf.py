@@ -0,0 +1,90 @@
+"""Production server: gunicorn preforking uvicorn workers, one per available core.
+
+    gunicorn app.main:app
+
+The app is imported and its shared state built once in the master, then
+inherited copy-on-write by each forked worker. `kill -HUP <master>` replaces
+the workers gracefully, letting each finish its in-flight requests first.
+"""
+
+import gc
+import os
+import asyncio
+import tempfile
+
+
+def available_cpus() -> int:
+    """Cores this container may use: its CPU quota if one is set, else its CPU affinity."""
+    cpus = len(os.sched_getaffinity(0))
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as file:
+            quota, period = file.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+# Listening address and worker count, overridable through the environment
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", str(available_cpus())))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Import the app in the master so workers share its code and preloaded data
+preload_app = True
+
+# Seconds a worker may take to finish in-flight requests on restart or shutdown,
+# and seconds of silence before a hung worker is killed and replaced
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+# Recycle each worker after this many requests, staggered so they do not all
+# restart at once (0 never recycles)
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", str(max_requests // 10)))
+
+# Access log destination ("-" for stdout, empty to disable)
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+
+# Each worker runs its own Prisma engine with PRISMA_CONNECTION_LIMIT connections,
+# so the database sees up to `workers` times that many
+
+# Workers publish metric snapshots here so any of them can report server totals
+os.environ.setdefault(
+    "METRICS_DIR", os.path.join(tempfile.gettempdir(), f"metrics-{os.getpid()}")
+)
+
+
+def on_starting(server):
+    from app.metrics import multiprocess
+
+    multiprocess.reset()
+
+
+def when_ready(server):
+    """Build the state workers share, after the app is imported and before any fork."""
+    from app.lifespan import preload
+
+    asyncio.run(preload())
+
+
+def pre_fork(server, worker):
+    # Move everything the master built out of the collector's reach, so a
+    # worker's garbage collections do not write to (and so copy) shared pages
+    gc.collect()
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    from app.metrics import multiprocess
+
+    multiprocess.archive_worker(worker.pid)
+
+
+def on_exit(server):
+    from app.metrics import multiprocess
+
+    multiprocess.reset()
+    os.rmdir(multiprocess.METRICS_DIR)
@@ -0,0 +1,163 @@
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+
+pytest.importorskip("prisma.client", reason="the Prisma client is not generated")
+
+from prisma.errors import UniqueViolationError  # noqa: E402
+from app import batch  # noqa: E402
+from app.skill.schema import SkillBatchUpdate, SkillCreate  # noqa: E402
+
+
+class FakeSkills:
+    """In-memory stand-in for a Prisma delegate whose names are unique."""
+
+    def __init__(self, *names):
+        self.ids = itertools.count(1)
+        self.rows = {}
+        for name in names:
+            self.insert(name)
+
+    def insert(self, name, **data):
+        row_id = f"id-{next(self.ids)}"
+        self.rows[row_id] = SimpleNamespace(id=row_id, name=name, **data)
+
+    async def find_many(self, where):
+        ((field, condition),) = where.items()
+        return [
+            row for row in self.rows.values() if getattr(row, field) in condition["in"]
+        ]
+
+    async def create_many(self, data, skip_duplicates):
+        names = {row.name for row in self.rows.values()}
+        for item in data:
+            if item["name"] not in names:
+                names.add(item["name"])
+                self.insert(**item)
+
+    async def delete_many(self, where):
+        for row_id in where["id"]["in"]:
+            del self.rows[row_id]
+
+    def names(self):
+        return {row_id: row.name for row_id, row in self.rows.items()}
+
+
+class FakeBatcher:
+    """Queues updates and applies them all or none, like `prisma.batch_()`."""
+
+    def __init__(self, skills):
+        self.skills = skills
+        self.updates = []
+        self.skill = SimpleNamespace(update=self.queue)
+
+    def queue(self, where, data):
+        self.updates.append((where["id"], data))
+
+    def commit(self):
+        names = self.skills.names()
+        for row_id, data in self.updates:
+            names[row_id] = data.get("name", names[row_id])
+        if len(set(names.values())) < len(names):
+            raise UniqueViolationError({}, message="Unique constraint failed on name")
+        for row_id, data in self.updates:
+            vars(self.skills.rows[row_id]).update(data)
+
+
+class FakePrisma:
+    def __init__(self, skills):
+        self.skill = skills
+
+    @asynccontextmanager
+    async def tx(self):
+        yield self
+
+    @asynccontextmanager
+    async def batch_(self):
+        batcher = FakeBatcher(self.skill)
+        yield batcher
+        batcher.commit()
+
+
+@pytest.fixture
+def skills(monkeypatch):
+    skills = FakeSkills("Welding", "Drafting")
+    monkeypatch.setattr(batch, "prisma", FakePrisma(skills))
+    return skills
+
+
+def statuses(result):
+    return [item["status"] for item in result["results"]]
+
+
+def test_create_reports_names_taken_in_the_database_or_the_request(skills):
+    items = [SkillCreate(name=name) for name in ("Welding", "Typing", "Typing")]
+    result = asyncio.run(batch.batch_create("skill", items))
+
+    assert statuses(result) == ["conflict", "created", "conflict"]
+    assert result["results"][2]["detail"] == "Duplicate name 'Typing' in request"
+    assert result["counts"] == {"conflict": 2, "created": 1}
+    assert sorted(skills.names().values()) == ["Drafting", "Typing", "Welding"]
+
+
+def test_update_checks_ids_and_names_before_writing(skills):
+    items = [
+        SkillBatchUpdate(id="id-1", description="Joining metal"),
+        SkillBatchUpdate(id="id-1", name="Again"),
+        SkillBatchUpdate(id="missing", name="Gone"),
+        SkillBatchUpdate(id="id-2", name="Welding"),
+    ]
+    result = asyncio.run(batch.batch_update("skill", items))
+
+    assert statuses(result) == ["updated", "conflict", "not_found", "conflict"]
+    assert result["results"][1]["detail"] == "Duplicate ID in request"
+    assert skills.rows["id-1"].description == "Joining metal"
+    assert skills.names() == {"id-1": "Welding", "id-2": "Drafting"}
+
+
+def test_update_rolls_back_a_chunk_that_still_collides(skills):
+    # Drafting moves to Welding's name, but Welding keeps it, so the chunk fails
+    items = [
+        SkillBatchUpdate(id="id-2", name="Welding"),
+        SkillBatchUpdate(id="id-1", description="Joining metal"),
+    ]
+    find_rows = skills.find_many
+
+    async def find_many(where):
+        # Hide the current owner from the up-front check, as a concurrent rename would
+        if "name" in where:
+            return []
+        return await find_rows(where)
+
+    skills.find_many = find_many
+    result = asyncio.run(batch.batch_update("skill", items))
+
+    assert statuses(result) == ["conflict", "conflict"]
+    assert result["results"][0]["detail"].startswith("Chunk rolled back")
+    assert skills.names() == {"id-1": "Welding", "id-2": "Drafting"}
+    assert not hasattr(skills.rows["id-1"], "description")
+
+
+def test_delete_reports_missing_ids(skills):
+    result = asyncio.run(batch.batch_delete("skill", ["id-1", "missing"]))
+
+    assert statuses(result) == ["deleted", "not_found"]
+    assert skills.names() == {"id-2": "Drafting"}
+
+
+def test_claim_names_keeps_the_first_use_of_each_name():
+    items = [SimpleNamespace(name=name) for name in ("a", None, "a", None, "b")]
+    results = [None] * len(items)
+
+    assert batch.claim_names(items, [0, 1, 2, 3, 4], results) == [0, 1, 3, 4]
+    assert results[2]["status"] == "conflict"
+
+
+def test_batches_over_the_limit_are_rejected(monkeypatch):
+    monkeypatch.setattr(batch, "MAX_BATCH_SIZE", 2)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(batch.batch_delete("skill", ["a", "b", "c"]))
+    assert error.value.status_code == 413
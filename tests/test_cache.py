@@ -0,0 +1,81 @@
+import asyncio
+from app import cache
+from app.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_evicts_least_recently_used(monkeypatch):
+    entries = TTLCache(maxsize=2, ttl=60)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    assert entries.get("a") == 1
+    entries.set("c", 3)
+
+    assert entries.get("b") is None
+    assert entries.get("a") == 1
+    assert entries.get("c") == 3
+    assert entries.evictions == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    entries = TTLCache(maxsize=4, ttl=10)
+    entries.set("a", 1)
+
+    clock.now = 9.9
+    assert entries.get("a") == 1
+    clock.now = 10.1
+    assert entries.get("a", "gone") == "gone"
+    assert entries.stats()["expirations"] == 1
+    assert entries.stats()["size"] == 0
+
+
+def test_get_or_load_caches_only_found_values():
+    entries = TTLCache()
+    calls = []
+
+    async def load(value):
+        calls.append(value)
+        return value
+
+    assert asyncio.run(entries.get_or_load("a", lambda: load(1))) == 1
+    assert asyncio.run(entries.get_or_load("a", lambda: load(2))) == 1
+    assert asyncio.run(entries.get_or_load("b", lambda: load(None))) is None
+    assert asyncio.run(entries.get_or_load("b", lambda: load(None))) is None
+    assert calls == [1, None, None]
+
+
+def test_get_or_load_drops_a_value_loaded_across_a_clear():
+    entries = TTLCache()
+
+    async def load_then_clear():
+        entries.clear()
+        return "stale"
+
+    assert asyncio.run(entries.get_or_load("a", load_then_clear)) == "stale"
+    assert entries.get("a") is None
+
+    async def load():
+        return "fresh"
+
+    assert asyncio.run(entries.get_or_load("a", load)) == "fresh"
+    assert entries.get("a") == "fresh"
+
+
+def test_stats_report_hit_ratio():
+    entries = TTLCache()
+    assert entries.stats()["hit_ratio"] is None
+    entries.set("a", 1)
+    entries.get("a")
+    entries.get("b")
+    assert entries.stats()["hits"] == 1
+    assert entries.stats()["misses"] == 1
+    assert entries.stats()["hit_ratio"] == 0.5
@@ -0,0 +1,95 @@
+import asyncio
+import gzip
+from app.compression import (
+    ENCODERS,
+    CompressionMiddleware,
+    compressed_etag,
+    negotiate,
+)
+
+
+def run_app(messages, accept_encoding="gzip", minimum_size=16):
+    """Send `messages` through the middleware and return what reached the client."""
+
+    async def app(scope, receive, send):
+        for message in messages:
+            await send(message)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    middleware = CompressionMiddleware(app, minimum_size=minimum_size)
+    asyncio.run(middleware(scope, None, send))
+    return sent
+
+
+def start(content_type=b"application/json", etag=None):
+    headers = [(b"content-type", content_type), (b"content-length", b"999")]
+    if etag:
+        headers.append((b"etag", etag))
+    return {"type": "http.response.start", "status": 200, "headers": headers}
+
+
+def body(data, more_body=False):
+    return {"type": "http.response.body", "body": data, "more_body": more_body}
+
+
+def test_negotiate_prefers_server_order_among_equal_qualities():
+    assert negotiate("gzip") == "gzip"
+    assert negotiate("identity") is None
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("*") == next(iter(ENCODERS))
+
+
+def test_negotiate_honours_quality_values():
+    assert negotiate("br;q=0.1, gzip;q=0.9") == "gzip"
+    assert negotiate("gzip;q=bad") is None
+
+
+def test_compressed_etag_only_suffixes_strong_tags():
+    assert compressed_etag(b'"abc"', "gzip") == b'"abc-gzip"'
+    assert compressed_etag(b'W/"abc"', "gzip") == b'W/"abc"'
+
+
+def test_large_responses_are_compressed():
+    payload = b'{"items": []}' * 100
+    sent = run_app([start(etag=b'"abc"'), body(payload)])
+    headers = dict(sent[0]["headers"])
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"etag"] == b'"abc-gzip"'
+    assert b"content-length" not in headers
+    assert gzip.decompress(sent[1]["body"]) == payload
+
+
+def test_small_responses_are_sent_as_is():
+    sent = run_app([start(), body(b"{}")])
+    headers = dict(sent[0]["headers"])
+
+    assert b"content-encoding" not in headers
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert sent[1]["body"] == b"{}"
+
+
+def test_binary_responses_are_not_compressed():
+    payload = b"\x00" * 100
+    sent = run_app([start(content_type=b"image/png"), body(payload)])
+    assert b"content-encoding" not in dict(sent[0]["headers"])
+    assert sent[1]["body"] == payload
+
+
+def test_streamed_chunks_are_flushed_as_they_arrive():
+    sent = run_app(
+        [start(b"application/x-ndjson"), body(b"one\n", True), body(b"two\n")]
+    )
+    first, last = sent[1]["body"], sent[2]["body"]
+
+    assert sent[1]["more_body"] is True
+    assert first
+    assert gzip.decompress(first + last) == b"one\ntwo\n"
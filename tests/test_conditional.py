@@ -0,0 +1,63 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+
+pytest.importorskip("prisma.client", reason="the Prisma client is not generated")
+
+from app import conditional  # noqa: E402
+from app.conditional import etag_matches, make_etag, match_route  # noqa: E402
+
+
+def test_routes_match_by_prefix_and_skip_unversioned_paths():
+    assert match_route("/v1/careers") == (("Career",), 0)
+    assert match_route("/v1/careers/123")[0] == ("Career",)
+    assert match_route("/v1/careersx") is None
+    assert match_route("/v1/onetoccupations/fetch") is None
+    assert match_route("/v1/onetoccupations/cache/stats") is None
+
+
+def test_etag_depends_on_version_and_url():
+    etag = make_etag("1:2024", "/v1/careers", b"limit=10")
+    assert etag == make_etag("1:2024", "/v1/careers", b"limit=10")
+    assert etag != make_etag("2:2024", "/v1/careers", b"limit=10")
+    assert etag != make_etag("1:2024", "/v1/careers", b"limit=20")
+
+
+def test_etag_matches_encoded_and_weak_forms():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag) == '"abc"'
+    assert etag_matches('W/"abc"', etag) == 'W/"abc"'
+    assert etag_matches('"other", "abc-gzip"', etag) == '"abc-gzip"'
+    assert etag_matches("*", etag) == etag
+    assert etag_matches('"abc-unknown"', etag) is None
+
+
+def test_not_modified_answers_record_the_matched_route(monkeypatch):
+    async def version(tables):
+        return "1:2024"
+
+    monkeypatch.setattr(conditional, "table_version", version)
+    app = FastAPI()
+
+    @app.get("/v1/careers/{career_id}")
+    async def get_career(career_id: str):
+        return {"id": career_id}
+
+    app.add_middleware(conditional.ConditionalGetMiddleware)
+    routes = []
+
+    async def recording(scope, receive, send):
+        await app(scope, receive, send)
+        routes.append(scope.get("route"))
+
+    async def get(headers=None):
+        transport = httpx.ASGITransport(app=recording)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as http:
+            return await http.get("/v1/careers/1", headers=headers)
+
+    etag = asyncio.run(get()).headers["etag"]
+    response = asyncio.run(get({"If-None-Match": etag}))
+
+    assert response.status_code == 304
+    assert [route.path for route in routes] == ["/v1/careers/{career_id}"] * 2
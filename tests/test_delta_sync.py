@@ -0,0 +1,202 @@
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+import httpx
+import pytest
+from fastapi import HTTPException
+
+pytest.importorskip("prisma.client", reason="the Prisma client is not generated")
+
+from app.external_data.onet import sync  # noqa: E402
+from app.external_data.onet.client import onet_client  # noqa: E402
+from app.external_data.onet.imports import jobs  # noqa: E402
+from app.external_data.onet.occupation import occupation  # noqa: E402
+
+LISTING = (
+    '<?xml version="1.0"?><occupations start="1" end="2" total="2">'
+    "<occupation><code>a</code><title>A</title></occupation>"
+    "<occupation><code>b</code><title>B</title></occupation>"
+    "</occupations>"
+)
+
+
+class FakeOccupations:
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.rows = {}
+
+    async def find_many(self, where):
+        ((field, condition),) = where.items()
+        return [
+            row for row in self.rows.values() if getattr(row, field) in condition["in"]
+        ]
+
+    async def create_many(self, data, skip_duplicates):
+        for item in data:
+            if any(
+                row.code == item["code"] or row.title == item["title"]
+                for row in self.rows.values()
+            ):
+                continue
+            row_id = str(next(self.ids))
+            self.rows[row_id] = SimpleNamespace(id=row_id, **item)
+
+    async def delete(self, where):
+        return self.rows.pop(where["id"], None)
+
+    async def delete_many(self):
+        self.rows.clear()
+
+
+class FakePages:
+    def __init__(self):
+        self.pages = {}
+
+    async def find_many(self, where):
+        return [page for page in self.pages.values() if page.kind == where["kind"]]
+
+    async def upsert(self, where, data):
+        key = where["kind_start_end"]
+        self.pages[key["kind"], key["start"], key["end"]] = SimpleNamespace(
+            **data["create"]
+        )
+
+    async def delete_many(self, where):
+        codes = where.get("codes", {}).get("hasSome")
+        for key, page in list(self.pages.items()):
+            if page.kind == where["kind"] and (
+                codes is None or set(codes) & set(page.codes)
+            ):
+                del self.pages[key]
+
+
+class FakePrisma:
+    """Just enough of the Prisma client for a delta sync and a delete."""
+
+    def __init__(self):
+        self.onetoccupation = FakeOccupations()
+        self.onetpage = FakePages()
+        self.onetimport = SimpleNamespace(update=self.update_import)
+        self.imports = {}
+
+    @asynccontextmanager
+    async def tx(self, timeout=None):
+        yield self
+
+    async def update_import(self, where, data):
+        if "occupations" not in data:
+            self.imports.setdefault(where["id"], {}).update(data)
+            return SimpleNamespace(id=where["id"], **self.imports[where["id"]])
+        codes = {row.code for row in self.onetoccupation.rows.values()}
+        for target in data["occupations"]["connect"]:
+            # Prisma fails the whole write when a connected record is missing
+            if "code" in target and target["code"] not in codes:
+                raise LookupError(f"No occupation with code {target['code']}")
+
+    def codes(self):
+        return sorted(row.code for row in self.onetoccupation.rows.values())
+
+
+def onet_handler(request):
+    if request.headers.get("If-None-Match") == '"v1"':
+        return httpx.Response(304)
+    return httpx.Response(
+        200,
+        text=LISTING,
+        headers={"Content-Type": "application/xml", "ETag": '"v1"'},
+    )
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    client = FakePrisma()
+    for module in (jobs, sync, occupation):
+        monkeypatch.setattr(module, "prisma", client)
+    monkeypatch.setattr(
+        onet_client,
+        "_client",
+        httpx.AsyncClient(
+            base_url=onet_client.base_url, transport=httpx.MockTransport(onet_handler)
+        ),
+    )
+    return client
+
+
+def test_deleted_record_is_restored_by_the_next_delta_sync(fake):
+    runner = jobs.ImportJobRunner()
+
+    async def scenario():
+        first = await runner._run_delta("import-1", "occupation")
+        assert first["createdRows"] == 2
+
+        # Nothing changed upstream, so the page is skipped
+        unchanged = await runner._run_delta("import-2", "occupation")
+        assert unchanged["skippedPages"] == 1
+
+        deleted = next(
+            row for row in fake.onetoccupation.rows.values() if row.code == "a"
+        )
+        await occupation.delete_onet_occupation(deleted.id)
+        assert fake.codes() == ["b"]
+
+        restored = await runner._run_delta("import-3", "occupation")
+        assert restored["createdRows"] == 1
+        assert restored["skippedPages"] == 0
+        assert fake.codes() == ["a", "b"]
+
+        await occupation.delete_all_onet_occupations()
+        assert fake.onetpage.pages == {}
+        restored = await runner._run_delta("import-4", "occupation")
+        assert restored["createdRows"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_deleting_a_missing_record_leaves_caches_alone(fake, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(occupation, "invalidate_onet_cache", invalidated.append)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(occupation.delete_onet_occupation("missing"))
+    assert error.value.status_code == 404
+    assert invalidated == []
+
+
+def test_pages_with_skipped_codes_are_fetched_again(fake):
+    # Another code already holds the title of "a", so "a" cannot be stored
+    asyncio.run(fake.onetoccupation.create_many([{"code": "z", "title": "A"}], True))
+    runner = jobs.ImportJobRunner()
+
+    async def scenario():
+        first = await runner._run_delta("import-1", "occupation")
+        assert first["skippedRows"] == 1
+        assert first["createdRows"] == 1
+        assert fake.onetpage.pages == {}
+
+        retried = await runner._run_delta("import-2", "occupation")
+        assert retried["skippedPages"] == 0
+        assert retried["skippedRows"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_snapshot_completes_the_import_and_records_why(fake, monkeypatch):
+    async def fail_snapshot(client, kind, import_id):
+        raise RuntimeError("snapshot failed")
+
+    async def no_removed(client, kind, import_id):
+        return 0
+
+    async def no_refresh(since):
+        pass
+
+    monkeypatch.setattr(jobs, "snapshot_entries", fail_snapshot)
+    monkeypatch.setattr(jobs, "count_removed", no_removed)
+    monkeypatch.setattr(jobs.occupation_index, "refresh_since", no_refresh)
+
+    asyncio.run(jobs.ImportJobRunner().run("import-1", "occupation", "delta"))
+
+    assert fake.imports["import-1"]["status"] == "completed"
+    assert fake.imports["import-1"]["snapshotError"] == "snapshot failed"
+    assert fake.imports["import-1"]["createdRows"] == 2
@@ -0,0 +1,61 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("prisma.client", reason="the Prisma client is not generated")
+
+from app.external_data.onet.imports import history  # noqa: E402
+
+ONET_IMPORT = SimpleNamespace(id="import-1", kind="occupation")
+
+
+class FakePrisma:
+    """Answers the snapshot probe, then records the page query it is sent."""
+
+    def __init__(self, snapshotted, rows=()):
+        self.snapshotted = snapshotted
+        self.rows = list(rows)
+        self.queries = []
+
+    async def query_raw(self, sql, *arguments):
+        self.queries.append((sql, arguments))
+        if "EXISTS" in sql:
+            return [{"found": self.snapshotted}]
+        return self.rows
+
+
+@pytest.fixture
+def use_prisma(monkeypatch):
+    def use(client):
+        monkeypatch.setattr(history, "prisma", client)
+        return client
+
+    return use
+
+
+def test_snapshotted_imports_read_their_entries(use_prisma):
+    use_prisma(FakePrisma(snapshotted=True))
+    source = asyncio.run(history.records_source(ONET_IMPORT, 1, 2))
+
+    assert 'FROM "OnetImportEntry"' in source
+    assert '"importId" = $1::uuid AND code > $2' in source
+
+
+def test_imports_without_entries_fall_back_to_current_titles(use_prisma):
+    use_prisma(FakePrisma(snapshotted=False))
+    source = asyncio.run(history.records_source(ONET_IMPORT, 3, 4))
+
+    assert 'FROM "_OnetImportOccupations" AS j' in source
+    assert 'JOIN "OnetOccupation" AS t ON t.id = j."B"' in source
+    assert 'j."A" = $3::uuid AND t.code > $4' in source
+
+
+def test_import_records_pages_by_code(use_prisma):
+    rows = [{"code": code, "title": code.upper()} for code in ("a", "b", "c")]
+    client = use_prisma(FakePrisma(snapshotted=True, rows=rows))
+
+    page = asyncio.run(history.import_records(ONET_IMPORT, 2))
+
+    assert page["items"] == rows[:2]
+    assert history.decode_code_cursor(page["next_cursor"]) == "b"
+    assert client.queries[-1][1] == ("import-1", "", 3)
@@ -0,0 +1,190 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("prisma.client", reason="the Prisma client is not generated")
+
+from app.external_data.onet.imports import jobs  # noqa: E402
+
+
+class FakeImports:
+    """Import records keyed by ID, with the writes made to them in order."""
+
+    def __init__(self):
+        self.records = {}
+        self.writes = []
+
+    async def update(self, where, data):
+        self.writes.append(data)
+        record = self.records.setdefault(where["id"], {"id": where["id"]})
+        record.update(data)
+        return SimpleNamespace(**record)
+
+    async def update_many(self, where, data):
+        cutoff = where.get("heartbeatAt", {}).get("lt")
+        stale = [
+            record
+            for record in self.records.values()
+            if record.get("status") == where["status"]
+            and record.get("heartbeatAt")
+            and record["heartbeatAt"] < cutoff
+        ]
+        for record in stale:
+            record.update(data)
+        return len(stale)
+
+
+class FakePrisma:
+    def __init__(self):
+        self.onetimport = FakeImports()
+
+    @asynccontextmanager
+    async def tx(self, timeout=None):
+        yield self
+
+
+@pytest.fixture
+def imports(monkeypatch):
+    client = FakePrisma()
+    monkeypatch.setattr(jobs, "prisma", client)
+    return client.onetimport
+
+
+def test_running_import_sends_heartbeats_until_it_ends(imports, monkeypatch):
+    async def slow_run(import_record, kind):
+        await asyncio.sleep(0.05)
+        return {"processedRows": 0}
+
+    async def nothing(*args):
+        return None
+
+    runner = jobs.ImportJobRunner()
+    monkeypatch.setattr(jobs, "ONET_IMPORT_HEARTBEAT", 0.01)
+    monkeypatch.setattr(runner, "_run_full", slow_run)
+    monkeypatch.setattr(runner, "_snapshot", nothing)
+    monkeypatch.setattr(jobs, "count_removed", nothing)
+    monkeypatch.setattr(jobs.occupation_index, "refresh_since", nothing)
+
+    async def scenario():
+        await runner.run("import-1", "occupation")
+        beats = len(imports.writes)
+        await asyncio.sleep(0.03)
+        return beats
+
+    beats = asyncio.run(scenario())
+
+    heartbeats = [data for data in imports.writes if list(data) == ["heartbeatAt"]]
+    assert heartbeats
+    assert imports.writes[-1]["status"] == "completed"
+    # The heartbeat stops with the run
+    assert len(imports.writes) == beats
+
+
+def test_imports_with_a_stale_heartbeat_are_failed(imports, monkeypatch):
+    monkeypatch.setattr(jobs, "ONET_IMPORT_STALE_AFTER", 60)
+    now = datetime.now(timezone.utc)
+    imports.records = {
+        "stale": {"status": "running", "heartbeatAt": now - timedelta(minutes=5)},
+        "alive": {"status": "running", "heartbeatAt": now},
+        "done": {"status": "completed", "heartbeatAt": now - timedelta(days=1)},
+    }
+
+    asyncio.run(jobs.ImportJobRunner().reap_stale())
+
+    assert imports.records["stale"]["status"] == "failed"
+    assert imports.records["stale"]["error"] == "Worker stopped reporting progress"
+    assert imports.records["alive"]["status"] == "running"
+    assert imports.records["done"]["status"] == "completed"
+
+
+# Page windows of a five-record listing read two records at a time
+PAGES = [(1, 2, ["a", "b"]), (3, 4, ["c", "d"]), (5, 5, ["e"]), (6, 7, [])]
+
+
+@pytest.fixture
+def crawl(imports, monkeypatch):
+    """Serve PAGES to full imports, failing once at the window starting at `fail_at`."""
+    state = SimpleNamespace(fail_at=None, starts=[], batches=[])
+
+    async def import_pages(kind, parser, start, page_size):
+        state.starts.append(start)
+        parser.total = 5
+        for page in PAGES:
+            if page[0] < start:
+                continue
+            if page[0] == state.fail_at:
+                state.fail_at = None
+                raise RuntimeError("connection lost")
+            yield page[0], page[1], [{"code": code} for code in page[2]]
+
+    async def ingest_records(client, kind, import_id, records):
+        state.batches.append([record["code"] for record in records])
+        return {"created": len(records), "updated": 0, "skipped": []}
+
+    monkeypatch.setattr(jobs, "import_pages", import_pages)
+    monkeypatch.setattr(jobs, "ingest_records", ingest_records)
+    monkeypatch.setattr(jobs, "ONET_PAGE_SIZE", 2)
+    monkeypatch.setattr(jobs, "ONET_IMPORT_BATCH_SIZE", 2)
+    return state
+
+
+def saved_import(imports):
+    record = imports.records["import-1"]
+    defaults = {
+        "checkpointEnd": None,
+        "processedRows": 0,
+        "createdRows": 0,
+        "updatedRows": 0,
+        "skippedRows": 0,
+        "pageCounts": [],
+    }
+    return SimpleNamespace(**{**defaults, **record})
+
+
+def test_full_import_resumes_after_its_last_committed_window(imports, crawl):
+    runner = jobs.ImportJobRunner()
+    imports.records["import-1"] = {"id": "import-1"}
+    crawl.fail_at = 3
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(runner._run_full(saved_import(imports), "occupation"))
+    assert imports.records["import-1"]["checkpointEnd"] == 2
+    assert imports.records["import-1"]["pageCounts"] == {"set": [2]}
+
+    record = saved_import(imports)
+    record.pageCounts = record.pageCounts["set"]
+    summary = asyncio.run(runner._run_full(record, "occupation"))
+
+    assert crawl.starts == [1, 3]
+    assert crawl.batches == [["a", "b"], ["c", "d"], ["e"]]
+    assert summary == {
+        "totalRows": 5,
+        "processedRows": 5,
+        "unchangedRows": 0,
+        "resumedRows": 2,
+    }
+    assert imports.records["import-1"]["checkpointEnd"] == 5
+    assert imports.records["import-1"]["pageCounts"] == {"set": [2, 2, 1]}
+
+
+def test_resume_after_the_last_window_commits_nothing(imports, crawl):
+    imports.records["import-1"] = {
+        "id": "import-1",
+        "pageSize": 2,
+        "checkpointEnd": 5,
+        "processedRows": 5,
+        "createdRows": 5,
+        "pageCounts": [2, 2, 1],
+    }
+    writes = len(imports.writes)
+
+    summary = asyncio.run(
+        jobs.ImportJobRunner()._run_full(saved_import(imports), "occupation")
+    )
+
+    assert crawl.starts == [6]
+    assert crawl.batches == []
+    assert len(imports.writes) == writes
+    assert summary["processedRows"] == summary["resumedRows"] == 5
@@ -0,0 +1,157 @@
+import asyncio
+import itertools
+from types import SimpleNamespace
+from app.external_data.onet.ingest import dedupe_records, ingest_records
+
+
+class FakeTable:
+    """In-memory stand-in for a Prisma delegate with unique codes and titles."""
+
+    def __init__(self, rows=()):
+        self.ids = itertools.count(1)
+        self.rows = {}
+        for code, title in rows:
+            self.insert(code, title)
+
+    def insert(self, code, title):
+        row = SimpleNamespace(id=str(next(self.ids)), code=code, title=title)
+        self.rows[row.id] = row
+
+    async def find_many(self, where):
+        ((field, condition),) = where.items()
+        return [
+            row for row in self.rows.values() if getattr(row, field) in condition["in"]
+        ]
+
+    def retitle(self, row_id, title):
+        if any(row.title == title for row in self.rows.values() if row.id != row_id):
+            raise AssertionError(f"unique constraint failed on title {title!r}")
+        self.rows[row_id].title = title
+
+    async def create_many(self, data, skip_duplicates):
+        for item in data:
+            taken = any(
+                row.code == item["code"] or row.title == item["title"]
+                for row in self.rows.values()
+            )
+            if not taken:
+                self.insert(item["code"], item["title"])
+
+
+class FakeClient:
+    def __init__(self, rows=()):
+        self.onetoccupation = FakeTable(rows)
+        self.statements = []
+        self.connected = []
+        self.onetimport = SimpleNamespace(update=self.update_import)
+
+    async def execute_raw(self, sql, *arguments):
+        self.statements.append(sql)
+        table = self.onetoccupation
+        if "parked:" in sql:
+            for row_id in arguments:
+                table.retitle(row_id, f"parked:{row_id}")
+            return len(arguments)
+        for row_id, title in zip(arguments[::2], arguments[1::2]):
+            table.retitle(row_id, title)
+        return len(arguments) // 2
+
+    async def update_import(self, where, data):
+        self.connected.extend(item["id"] for item in data["occupations"]["connect"])
+
+
+def records(*pairs):
+    return [{"code": code, "title": title} for code, title in pairs]
+
+
+def test_dedupe_keeps_first_occurrence():
+    unique = dedupe_records(records(("a", "A"), ("b", "B"), ("a", "A2")))
+    assert list(unique) == ["a", "b"]
+    assert unique["a"]["title"] == "A"
+
+
+def test_ingest_creates_retitles_and_connects_in_few_queries():
+    client = FakeClient([("a", "A"), ("b", "B")])
+    counts = asyncio.run(
+        ingest_records(
+            client,
+            "occupation",
+            "import",
+            records(("a", "A"), ("b", "B2"), ("c", "C"), ("d", "D")),
+        )
+    )
+
+    assert counts == {"created": 2, "updated": 1, "existing": 2, "skipped": []}
+    assert len(client.statements) == 1
+    assert sorted(row.title for row in client.onetoccupation.rows.values()) == [
+        "A",
+        "B2",
+        "C",
+        "D",
+    ]
+    assert len(client.connected) == 4
+
+
+def test_ingest_reports_codes_dropped_by_a_title_conflict(caplog):
+    client = FakeClient([("a", "Shared")])
+    counts = asyncio.run(
+        ingest_records(
+            client, "occupation", "import", records(("a", "Shared"), ("b", "Shared"))
+        )
+    )
+
+    assert counts["created"] == 0
+    assert counts["skipped"] == ["b"]
+    assert client.statements == []
+    assert "b" in caplog.text
+
+
+def titles(client):
+    return {row.code: row.title for row in client.onetoccupation.rows.values()}
+
+
+def test_ingest_skips_retitles_to_a_title_another_code_keeps(caplog):
+    client = FakeClient([("a", "A"), ("b", "B"), ("c", "C")])
+    counts = asyncio.run(
+        ingest_records(
+            client,
+            "occupation",
+            "import",
+            # b keeps B, so a cannot take it; a then keeps A, so c cannot either
+            records(("a", "B"), ("b", "B"), ("c", "A"), ("d", "D")),
+        )
+    )
+
+    assert counts["updated"] == 0
+    assert counts["skipped"] == ["a", "c"]
+    assert titles(client) == {"a": "A", "b": "B", "c": "C", "d": "D"}
+    assert len(client.connected) == 4
+    assert "a, c" in caplog.text
+
+
+def test_ingest_skips_all_but_the_first_code_asking_for_a_title():
+    client = FakeClient([("a", "A"), ("b", "B")])
+    counts = asyncio.run(
+        ingest_records(client, "occupation", "import", records(("a", "X"), ("b", "X")))
+    )
+
+    assert counts["updated"] == 1
+    assert counts["skipped"] == ["b"]
+    assert titles(client) == {"a": "X", "b": "B"}
+
+
+def test_ingest_parks_titles_to_swap_them():
+    client = FakeClient([("a", "A"), ("b", "B"), ("c", "C")])
+    counts = asyncio.run(
+        ingest_records(
+            client,
+            "occupation",
+            "import",
+            records(("a", "B"), ("b", "A"), ("c", "C2")),
+        )
+    )
+
+    assert counts["updated"] == 3
+    assert counts["skipped"] == []
+    assert len(client.statements) == 2
+    assert titles(client) == {"a": "B", "b": "A", "c": "C2"}
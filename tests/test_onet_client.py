@@ -0,0 +1,139 @@
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+import httpx
+import pytest
+from app.external_data.onet import client
+from app.external_data.onet.client import (
+    CircuitBreaker,
+    OnetClient,
+    OnetUnavailable,
+    backoff_delay,
+    retry_after_seconds,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_retry_after_accepts_seconds_and_dates():
+    assert retry_after_seconds("3") == 3
+    assert retry_after_seconds("-1") == 0
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("soon") is None
+    later = datetime.now(timezone.utc) + timedelta(seconds=60)
+    assert 55 < retry_after_seconds(format_datetime(later, usegmt=True)) <= 60
+
+
+def test_backoff_is_jittered_below_a_capped_exponential():
+    for attempt in range(8):
+        assert 0 <= backoff_delay(attempt, 0.5, 4) <= min(4, 0.5 * 2**attempt)
+
+
+def test_breaker_opens_after_threshold_and_probes_after_reset(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(client.time, "monotonic", clock)
+    breaker = CircuitBreaker(threshold=2, reset_timeout=10)
+
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(OnetUnavailable) as error:
+        breaker.check()
+    assert error.value.retry_after == 10
+
+    # One probe goes through after the reset timeout; others keep failing fast
+    clock.now += 10
+    breaker.check()
+    with pytest.raises(OnetUnavailable):
+        breaker.check()
+
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.check()
+
+
+def test_failed_probe_reopens_the_breaker(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(client.time, "monotonic", clock)
+    breaker = CircuitBreaker(threshold=1, reset_timeout=10)
+    breaker.record_failure()
+
+    clock.now += 10
+    breaker.check()
+    breaker.record_failure()
+    with pytest.raises(OnetUnavailable):
+        breaker.check()
+
+
+class SlowBody(httpx.AsyncByteStream):
+    """Body that keeps trickling in, each chunk well inside the read timeout."""
+
+    async def __aiter__(self):
+        for _ in range(20):
+            await asyncio.sleep(0.05)
+            yield b"<ok/>"
+
+
+def fetch(statuses, **options):
+    """GET through a client whose upstream answers with `statuses` in turn."""
+    answers = iter(statuses)
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        status = next(answers)
+        if status == "drop":
+            raise httpx.ConnectError("dropped", request=request)
+        if status == "slow":
+            return httpx.Response(200, stream=SlowBody())
+        return httpx.Response(status, text="<ok/>")
+
+    onet = OnetClient(base_url="http://onet.test", rate_limit=0, **options)
+    onet._client = httpx.AsyncClient(
+        base_url="http://onet.test", transport=httpx.MockTransport(handler)
+    )
+
+    async def get():
+        try:
+            async with onet.stream("/online/occupations") as response:
+                await response.aread()
+                return response
+        finally:
+            await onet.aclose()
+
+    return asyncio.run(get()), requests, onet
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(client, "ONET_BACKOFF_BASE", 0)
+
+
+def test_transient_failures_are_retried():
+    response, requests, onet = fetch(["drop", 503, 200], max_retries=2)
+    assert response.status_code == 200
+    assert len(requests) == 3
+    assert onet.breaker.failures == 0
+
+
+def test_retries_stop_at_the_limit():
+    with pytest.raises(httpx.HTTPStatusError):
+        fetch([503, 503, 503], max_retries=1)
+
+
+def test_client_errors_are_not_retried():
+    with pytest.raises(httpx.HTTPStatusError) as error:
+        fetch([404, 200], max_retries=3)
+    assert error.value.response.status_code == 404
+
+
+def test_slow_body_is_cut_off_at_the_total_deadline():
+    with pytest.raises(httpx.ReadTimeout):
+        fetch(["slow"], total_timeout=0.2, request_timeout=1)
@@ -0,0 +1,43 @@
+import asyncio
+import httpx
+from app.external_data.onet.client import onet_client
+from app.external_data.onet.pagination import fetch_all_pages, page_windows
+
+# Codes of a five-record listing, with one code repeated across pages
+CODES = ["a", "b", "c", "a", "d"]
+
+
+def test_page_windows_cover_the_total():
+    assert page_windows(7, 3) == [(1, 3), (4, 6), (7, 7)]
+    assert page_windows(7, 3, start=4) == [(4, 6), (7, 7)]
+    assert page_windows(0, 3) == []
+
+
+def listing_handler(request):
+    start = int(request.url.params["start"])
+    end = int(request.url.params["end"])
+    body = "".join(
+        f"<occupation><code>{code}</code><title>{code.upper()}</title></occupation>"
+        for code in CODES[start - 1 : end]
+    )
+    return httpx.Response(
+        200,
+        text=f'<occupations start="{start}" end="{end}" total="{len(CODES)}">'
+        f"{body}</occupations>",
+        headers={"Content-Type": "application/xml"},
+    )
+
+
+def test_fetch_all_pages_reassembles_windows_in_order(monkeypatch):
+    monkeypatch.setattr(
+        onet_client,
+        "_client",
+        httpx.AsyncClient(
+            base_url=onet_client.base_url,
+            transport=httpx.MockTransport(listing_handler),
+        ),
+    )
+
+    records = asyncio.run(fetch_all_pages("/occupations", "occupation", page_size=2))
+
+    assert [record["code"] for record in records] == ["a", "b", "c", "d"]
@@ -0,0 +1,40 @@
+from app.external_data.onet.parser import OnetRecordParser
+
+LISTING = (
+    b'<?xml version="1.0"?><occupations start="1" end="2" total="7">'
+    b"<occupation><code>11-1011.00</code><title>Chief Executives</title></occupation>"
+    b"<occupation><code>11-1021.00</code><title>General Managers</title></occupation>"
+    b"</occupations>"
+)
+
+
+def parse_in_chunks(parser, data, size):
+    records = []
+    for i in range(0, len(data), size):
+        records.extend(parser.feed(data[i : i + size]))
+    return records + parser.close()
+
+
+def test_records_and_total_survive_any_chunking():
+    for size in (1, 7, len(LISTING)):
+        parser = OnetRecordParser("occupation")
+        assert parse_in_chunks(parser, LISTING, size) == [
+            {"code": "11-1011.00", "title": "Chief Executives"},
+            {"code": "11-1021.00", "title": "General Managers"},
+        ]
+        assert parser.total == 7
+
+
+def test_total_reported_as_child_element():
+    parser = OnetRecordParser("industry")
+    data = b"<industries><total>3</total></industries>"
+    assert parse_in_chunks(parser, data, 5) == []
+    assert parser.total == 3
+
+
+def test_reset_starts_over_and_keeps_total():
+    parser = OnetRecordParser("occupation")
+    parser.feed(LISTING[:60])
+    parser.reset()
+    assert len(parse_in_chunks(parser, LISTING, 13)) == 2
+    assert parser.total == 7
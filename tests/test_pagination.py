@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from app.pagination import decode_cursor, encode_cursor, keyset_where, paginate
+
+CREATED = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+def row(row_id, created_at=CREATED):
+    return SimpleNamespace(id=row_id, createdAt=created_at)
+
+
+class FakeDelegate:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def find_many(self, **arguments):
+        self.calls.append(arguments)
+        return self.rows[: arguments["take"]]
+
+
+def test_cursor_round_trips_row_position():
+    assert decode_cursor(encode_cursor(row("b"))) == (CREATED, "b")
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm90IGpzb24=", "WzFd"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_keyset_where_continues_after_cursor():
+    where = keyset_where(encode_cursor(row("b")), {"name": "x"})
+    assert where == {
+        "AND": [
+            {"name": "x"},
+            {
+                "OR": [
+                    {"createdAt": {"gt": CREATED}},
+                    {"createdAt": CREATED, "id": {"gt": "b"}},
+                ]
+            },
+        ]
+    }
+    assert keyset_where(None) is None
+
+
+def test_paginate_returns_cursor_only_when_more_rows_exist():
+    delegate = FakeDelegate([row("a"), row("b"), row("c")])
+
+    page = asyncio.run(paginate(delegate, limit=2))
+    assert [item.id for item in page["items"]] == ["a", "b"]
+    assert decode_cursor(page["next_cursor"]) == (CREATED, "b")
+    assert delegate.calls[0]["take"] == 3
+
+    page = asyncio.run(paginate(delegate, limit=3))
+    assert page["next_cursor"] is None
@@ -0,0 +1,67 @@
+import pytest
+from app.external_data.onet.release import (
+    CopyStream,
+    database_dsn,
+    dedupe_codes,
+    iter_release_records,
+)
+
+
+def lines(*rows):
+    return iter(row.encode("utf-8") for row in rows)
+
+
+def test_release_records_follow_the_header_columns():
+    records = iter_release_records(
+        lines(
+            "\ufeffTitle\tO*NET-SOC Code\tDescription\r\n",
+            "Chief Executives \t11-1011.00\tPlan\r\n",
+            "short row\n",
+            "Café Managers\t11-9051.00\tRun\n",
+        ),
+        "O*NET-SOC Code",
+        "Title",
+    )
+    assert list(records) == [
+        ("11-1011.00", "Chief Executives"),
+        ("11-9051.00", "Café Managers"),
+    ]
+
+
+def test_release_records_require_both_columns():
+    with pytest.raises(ValueError, match="Title"):
+        list(iter_release_records(lines("Code\tName\n"), "Code", "Title"))
+
+
+def test_dedupe_codes_keeps_the_first_title_and_drops_blank_codes():
+    records = [("a", "A"), ("", "Blank"), ("b", "B"), ("a", "A2")]
+    assert list(dedupe_codes(records)) == [("a", "A"), ("b", "B")]
+
+
+def test_copy_stream_escapes_and_serves_any_read_size():
+    records = [("a", "Tab\there"), ("b", "Back\\slash\nline")]
+    expected = b"a\tTab\\there\nb\tBack\\\\slash\\nline\n"
+    for size in (1, 5, 64):
+        stream = CopyStream(records)
+        data = b"".join(iter(lambda: stream.read(size), b""))
+        assert data == expected
+        assert stream.rows == 2
+    assert CopyStream(records).read() == expected
+
+
+def test_dsn_drops_prisma_params_and_keeps_libpq_ones():
+    dsn = database_dsn(
+        "postgresql://user:secret@db:5432/app"
+        "?connection_limit=5&pool_timeout=10&sslmode=require&pgbouncer=true"
+    )
+    assert dsn == "postgresql://user:secret@db:5432/app?sslmode=require"
+
+
+def test_dsn_applies_the_schema_as_search_path():
+    dsn = database_dsn(
+        "postgresql://db/app?schema=reports&options=-cstatement_timeout%3D5s"
+    )
+    assert dsn == (
+        "postgresql://db/app"
+        "?options=-cstatement_timeout%3D5s%20-csearch_path%3D%22reports%22"
+    )
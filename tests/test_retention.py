@@ -0,0 +1,69 @@
+import os
+import re
+from datetime import datetime, timedelta, timezone
+import pytest
+
+pytest.importorskip("prisma.client", reason="the Prisma client is not generated")
+psycopg2 = pytest.importorskip("psycopg2")
+
+from app.external_data.onet.imports.retention import PRUNABLE_IMPORTS_SQL  # noqa: E402
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set"
+)
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def cursor():
+    connection = psycopg2.connect(TEST_DATABASE_URL)
+    try:
+        with connection.cursor() as cursor:
+            # A temp table shadows any real OnetImport for this session only
+            cursor.execute(
+                'CREATE TEMP TABLE "OnetImport" '
+                '(id text, kind text, status text, "createdAt" timestamptz)'
+            )
+            yield cursor
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+def prunable(cursor, imports, keep, keep_days):
+    cursor.executemany(
+        'INSERT INTO "OnetImport" VALUES (%s, %s, %s, %s)',
+        [(id, kind, status, NOW - age) for id, kind, status, age in imports],
+    )
+    # Prisma's $n placeholders, as psycopg2 named parameters
+    sql = re.sub(r"\$(\d)", r"%(p\1)s", PRUNABLE_IMPORTS_SQL)
+    cursor.execute(sql, {"p1": keep, "p2": keep_days, "p3": 100})
+    return [row[0] for row in cursor.fetchall()]
+
+
+def test_newest_completed_import_of_each_kind_is_kept(cursor):
+    days = timedelta(days=1)
+    imports = [
+        ("old", "occupation", "completed", 4 * days),
+        ("latest", "occupation", "completed", 3 * days),
+        ("failed", "occupation", "failed", 2 * days),
+        ("queued", "occupation", "queued", 1 * days),
+        ("only", "industry", "completed", 9 * days),
+    ]
+    assert prunable(cursor, imports, keep=1, keep_days=0) == ["old", "failed"]
+
+
+def test_age_rule_keeps_recent_imports(cursor):
+    days = timedelta(days=1)
+    imports = [
+        ("expired", "occupation", "completed", 60 * days),
+        ("expired-failed", "occupation", "failed", 40 * days),
+        ("recent", "occupation", "failed", 2 * days),
+        ("latest", "occupation", "completed", 50 * days),
+    ]
+    assert prunable(cursor, imports, keep=0, keep_days=30) == [
+        "expired",
+        "expired-failed",
+    ]
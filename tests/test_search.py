@@ -0,0 +1,44 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+pytest.importorskip("prisma.client", reason="the Prisma client is not generated")
+
+from app.search import search  # noqa: E402
+
+
+class FakePrisma:
+    def __init__(self):
+        self.queries = []
+
+    async def query_raw(self, sql, *arguments):
+        self.queries.append((sql, arguments))
+        return []
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakePrisma()
+    monkeypatch.setattr(search, "prisma", fake)
+    app = FastAPI()
+    app.include_router(search.router)
+    return TestClient(app), fake
+
+
+def test_queries_shorter_than_a_trigram_are_rejected(client):
+    http, fake = client
+    assert http.get("/v1/search/", params={"q": "ab"}).status_code == 422
+    assert fake.queries == []
+
+
+def test_each_table_is_ranked_and_limited_before_the_merge(client):
+    http, fake = client
+    response = http.get(
+        "/v1/search/",
+        params={"q": "nurse", "types": ["career", "skill"], "limit": 5, "offset": 10},
+    )
+
+    assert response.json() == {"items": [], "next_offset": None}
+    sql, arguments = fake.queries[0]
+    assert sql.count("LIMIT $3 + $4)") == 2
+    assert arguments == ("nurse", "%nurse%", 6, 10)
@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("prisma.client", reason="the Prisma client is not generated")
+
+from app.external_data.onet.occupation.suggest import (  # noqa: E402
+    PrefixIndex,
+    index_keys,
+)
+
+OCCUPATIONS = [
+    {"code": "15-1252.00", "title": "Software Developers"},
+    {"code": "15-1211.00", "title": "Computer Systems Analysts"},
+    {"code": "29-1141.00", "title": "Registered Nurses"},
+]
+
+
+def codes(results):
+    return [result["code"] for result in results]
+
+
+def test_index_keys_cover_code_title_and_word_suffixes():
+    assert index_keys("A-1", "Web/Mobile Developers") == {
+        "a-1",
+        "web/mobile developers",
+        "mobile developers",
+        "developers",
+    }
+
+
+def test_suggest_matches_codes_titles_and_inner_words():
+    index = PrefixIndex()
+    index.build(OCCUPATIONS)
+
+    assert codes(index.suggest("15-12")) == ["15-1211.00", "15-1252.00"]
+    assert codes(index.suggest("soft")) == ["15-1252.00"]
+    assert codes(index.suggest("NURSE")) == ["29-1141.00"]
+    assert codes(index.suggest("s", limit=1)) == ["15-1252.00"]
+    assert index.suggest("zzz") == []
+
+
+def test_update_rekeys_retitled_records_and_remove_drops_them():
+    index = PrefixIndex()
+    index.build(OCCUPATIONS)
+
+    index.update([{"code": "29-1141.00", "title": "Nurse Practitioners"}])
+    assert codes(index.suggest("registered")) == []
+    assert codes(index.suggest("practitioners")) == ["29-1141.00"]
+
+    index.remove(["29-1141.00", "missing"])
+    assert index.suggest("nurse") == []
+    assert len(index) == 2